@@ -0,0 +1,314 @@
+"""
+
+Headless batch generation of TPMS scaffolds.
+
+Usage:
+
+    python batch.py sweep.json --output results --workers 8
+
+    The sweep specification is either a JSON object, where every parameter holds a single value or a list of values and all
+    the combinations are generated, or a CSV file with one variant per row and the parameter names as header. Parameters
+    not given take the values of DEFAULT_PARAMETERS. The solid and pore STL files of every variant are written to the
+    output folder together with a single "manifest.json" describing all of them.
+
+This module does not import PySide6 or VTK.
+
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from pipeline import Generate_Model
+from mesh_generator import Convert_STL
+from cache import Model_Cache
+
+##################################################
+#              Batch Sweep Functions             #
+##################################################
+
+DEFAULT_PARAMETERS = {
+    'Equation': "Gyroid",
+    'Domain': "Cube",
+    'Topology': "Solid 1",
+    'Method': "Relative Density",
+    'Density': 0.3,
+    'Length': None,
+    'Radius': None,
+    'InnerRadius': None,
+    'Resolution': 50,
+    'NX': 1.0, 'NY': 1.0, 'NZ': 1.0,
+    'LX': 1.0, 'LY': 1.0, 'LZ': 1.0,
+    'Dtype': "float64",
+    'Solver': "Quantile",
+    'Process': False
+}
+
+##################################################
+#             Function: Read_Sweep               #
+##################################################
+
+def Read_Sweep(Path):
+
+    """
+
+    Read a sweep specification and expand it into the list of model variants.
+
+    Parameters:
+
+        - Path [String]: Location of the JSON or CSV sweep specification.
+
+    Returns:
+
+        - Variants [List]: List of parameter dictionaries, one per model variant.
+
+    """
+
+    if Path.lower().endswith(".json"):
+
+        # Cartesian product of every parameter given as a list.
+
+        with open(Path) as File:
+            Specification = json.load(File)
+
+        Names = list(Specification)
+        Values = [Value if isinstance(Value, list) else [Value] for Value in Specification.values()]
+        Variants = [dict(zip(Names, Combination)) for Combination in itertools.product(*Values)]
+
+    elif Path.lower().endswith(".csv"):
+
+        # One explicit variant per row.
+
+        with open(Path, newline='') as File:
+            Variants = [{Name: Parse_Value(Value) for Name, Value in Row.items() if Value != ""} for Row in csv.DictReader(File)]
+
+    else:
+        raise ValueError("Sweep specification must be a .json or .csv file.")
+
+    Variants = [Complete_Parameters(Variant) for Variant in Variants]
+
+    return Variants
+
+##################################################
+#             Function: Parse_Value              #
+##################################################
+
+def Parse_Value(Value):
+
+    """
+
+    Convert a CSV field into a number when possible.
+
+    Parameters:
+
+        - Value [String]: CSV field.
+
+    Returns:
+
+        - Value [Integer/Float/String]: Parsed value.
+
+    """
+
+    for Type in (int, float):
+        try:
+            return Type(Value)
+        except ValueError:
+            pass
+
+    return Value.strip()
+
+##################################################
+#          Function: Complete_Parameters         #
+##################################################
+
+def Complete_Parameters(Variant):
+
+    """
+
+    Fill the missing parameters of a variant with the defaults, following the same rules as the application.
+
+    Parameters:
+
+        - Variant [Dictionary]: Parameters given by the sweep specification.
+
+    Returns:
+
+        - Parameters [Dictionary]: Complete model parameters.
+
+    """
+
+    Unknown = set(Variant) - set(DEFAULT_PARAMETERS)
+
+    if Unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(Unknown))}")
+
+    Parameters = dict(DEFAULT_PARAMETERS, **Variant)
+
+    # Missing length or radius are derived from each other as in the application, with a unit cube if both are missing.
+
+    if Parameters['Length'] is None and Parameters['Radius'] is not None:
+        Parameters['Length'] = Parameters['Radius'] * 2.3
+    elif Parameters['Radius'] is None and Parameters['Length'] is not None:
+        Parameters['Radius'] = Parameters['Length']
+    elif Parameters['Length'] is None and Parameters['Radius'] is None:
+        Parameters['Length'], Parameters['Radius'] = 1.0, 1.0
+
+    return Parameters
+
+##################################################
+#             Function: Limit_Memory             #
+##################################################
+
+def Limit_Memory(Megabytes):
+
+    """
+
+    Process pool initializer bounding the address space of every worker process.
+
+    Parameters:
+
+        - Megabytes [Integer]: Memory limit per worker. No limit is applied if None.
+
+    Returns:
+
+        - Nothing.
+
+    """
+
+    if Megabytes is None:
+        return
+
+    import resource
+
+    Limit = int(Megabytes) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (Limit, Limit))
+
+##################################################
+#             Function: Run_Variant              #
+##################################################
+
+def Run_Variant(Index, Parameters, Output, Cache_Directory=None):
+
+    """
+
+    Generate one model variant and export its solid and pore meshes.
+
+    Parameters:
+
+        - Index [Integer]: Variant number, used to name the files.
+        - Parameters [Dictionary]: Complete model parameters.
+        - Output [String]: Output folder.
+        - Cache_Directory [String]: Optional folder of the model cache shared by all the workers.
+
+    Returns:
+
+        - Record [Dictionary]: Manifest entry of the variant.
+
+    """
+
+    Record = {'Index': Index, 'Parameters': Parameters}
+    Start = time.perf_counter()
+
+    try:
+
+        Cache = None if Cache_Directory is None else Model_Cache(Cache_Directory)
+        Model = Generate_Model(dict(Parameters, Dtype=np.dtype(Parameters['Dtype'])), Workers=1, Cache=Cache)
+
+        Solid_Path = os.path.join(Output, f"tpms_{Index:05d}.stl")
+        Pores_Path = os.path.join(Output, f"tpms_{Index:05d}_pores.stl")
+        Convert_STL(Model['TPMS_Vertices'], Model['TPMS_Faces'], Solid_Path)
+        Convert_STL(Model['Pores_Vertices'], Model['Pores_Faces'], Pores_Path)
+
+        Domain = Model['Domain']
+
+        Record.update({
+            'Status': "Done",
+            'Solid_STL': os.path.basename(Solid_Path),
+            'Pores_STL': os.path.basename(Pores_Path),
+            'Isovalue': Model['Isovalue'],
+            'Relative_Density': float(np.count_nonzero(Model['TPMS'][Domain] >= 0) / np.count_nonzero(Domain)),
+            'Vertices': int(Model['TPMS_Vertices'].shape[0]),
+            'Faces': int(Model['TPMS_Faces'].shape[0])
+        })
+
+    except Exception as e:
+        Record.update({'Status': "Failed", 'Error': f"{type(e).__name__}: {e}"})
+
+    Record['Seconds'] = round(time.perf_counter() - Start, 3)
+
+    return Record
+
+##################################################
+#              Function: Run_Sweep               #
+##################################################
+
+def Run_Sweep(Variants, Output, Workers=None, Tasks_Per_Worker=None, Memory=None, Cache_Directory=None):
+
+    """
+
+    Generate every variant across a process pool and write the results manifest.
+
+    Parameters:
+
+        - Variants [List]: List of complete parameter dictionaries.
+        - Output [String]: Output folder.
+        - Workers [Integer]: Number of worker processes. All the available processors are used if None.
+        - Tasks_Per_Worker [Integer]: Optional number of variants generated by a worker process before it is replaced, releasing its memory.
+          Recycling starts a fresh interpreter per worker, so the workers are kept for the whole sweep if None and
+          their memory is bounded by Memory instead.
+        - Memory [Integer]: Optional memory limit per worker process in megabytes.
+        - Cache_Directory [String]: Optional folder of the model cache, reusing the models of previous sweeps.
+
+    Returns:
+
+        - Manifest [List]: Manifest entries of all the variants.
+
+    """
+
+    os.makedirs(Output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=Workers, max_tasks_per_child=Tasks_Per_Worker, initializer=Limit_Memory, initargs=(Memory,)) as Executor:
+
+        Futures = [Executor.submit(Run_Variant, Index, Parameters, Output, Cache_Directory) for Index, Parameters in enumerate(Variants)]
+        Manifest = []
+
+        for Future in Futures:
+            Record = Future.result()
+            Manifest.append(Record)
+            print(f"[{len(Manifest)}/{len(Variants)}] Variant {Record['Index']}: {Record['Status']} ({Record['Seconds']} s)")
+
+    with open(os.path.join(Output, "manifest.json"), "w") as File:
+        json.dump(Manifest, File, indent=2)
+
+    return Manifest
+
+##################################################
+#                 Function: Main                 #
+##################################################
+
+def Main(Arguments=None):
+
+    Parser = argparse.ArgumentParser(description="Headless batch generation of TPMS scaffolds.")
+    Parser.add_argument("sweep", help="JSON or CSV sweep specification.")
+    Parser.add_argument("--output", default="tpms_batch", help="Output folder for the STL files and the manifest.")
+    Parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    Parser.add_argument("--tasks-per-worker", type=int, default=None, help="Variants generated by a worker process before it is replaced. Workers are kept for the whole sweep by default.")
+    Parser.add_argument("--memory", type=int, default=None, help="Memory limit per worker process in megabytes.")
+    Parser.add_argument("--cache", default=None, help="Model cache folder shared with previous runs and the application.")
+    Arguments = Parser.parse_args(Arguments)
+
+    Variants = Read_Sweep(Arguments.sweep)
+    Manifest = Run_Sweep(Variants, Arguments.output, Arguments.workers, Arguments.tasks_per_worker, Arguments.memory, Arguments.cache)
+
+    Failed = sum(Record['Status'] != "Done" for Record in Manifest)
+    print(f"{len(Manifest) - Failed} variants generated, {Failed} failed. Manifest saved to {os.path.join(Arguments.output, 'manifest.json')}")
+
+    return 1 if Failed else 0
+
+if __name__ == "__main__":
+    sys.exit(Main())
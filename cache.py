@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import functools
+import tempfile
+import zipfile
+import numpy as np
+
+##################################################
+#               Model Cache Storage              #
+##################################################
+
+# Bump whenever a change in the generation functions modifies their results, invalidating the stored entries.
+
+CACHE_VERSION = 2
+
+# The generation modules and the calibration tables are also hashed into every key, so editing them invalidates the
+# entries even without a bump.
+
+SOURCE_FILES = ("tpms_generator.py", "mesh_generator.py", "pipeline.py", "calibration.py", "calibration.json")
+
+CACHE_DIRECTORY = os.environ.get("TPMS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "tpms_generator"))
+
+##################################################
+#             Function: Source_Hash              #
+##################################################
+
+@functools.lru_cache(maxsize=None)
+def Source_Hash():
+
+    """
+
+    Hash the source of the generation modules and the calibration tables once per process. Missing files are skipped.
+
+    """
+
+    Hash = hashlib.sha256()
+    Directory = os.path.dirname(os.path.abspath(__file__))
+
+    for Name in SOURCE_FILES:
+        try:
+            with open(os.path.join(Directory, Name), "rb") as File:
+                Hash.update(File.read().replace(b"\r\n", b"\n"))
+        except OSError:
+            continue
+
+    return Hash.hexdigest()
+
+##################################################
+#               Class: Model_Cache               #
+##################################################
+
+class Model_Cache:
+
+    """
+
+    Content-addressed on-disk cache of generated arrays. Every entry is a compressed .npz file named by the hash of
+    the parameters that produced it, and the least recently used entries are evicted once the total size exceeds the
+    limit. Entries are written atomically, so several processes can share the same directory.
+
+    Parameters:
+
+        - Directory [String]: Cache folder. The TPMS_CACHE environment variable or ~/.cache/tpms_generator if None.
+        - Max_Size [Integer]: Maximum total size of the cache in bytes.
+
+    """
+
+    def __init__(self, Directory=None, Max_Size=2 * 1024 ** 3):
+
+        if Max_Size <= 0:
+            raise ValueError("Max_Size must be a positive integer")
+
+        self.Directory = CACHE_DIRECTORY if Directory is None else Directory
+        self.Max_Size = Max_Size
+
+        os.makedirs(self.Directory, exist_ok=True)
+
+    def Key(self, *Parts):
+
+        """
+
+        Hash a parameter tuple into an entry key. Arrays are hashed by dtype, shape and content, NumPy scalars and
+        dtypes by their value.
+
+        """
+
+        Hash = hashlib.sha256(str(CACHE_VERSION).encode())
+        Hash.update(Source_Hash().encode())
+
+        for Part in Parts:
+            if isinstance(Part, np.ndarray):
+                Hash.update(f"{Part.dtype.str}{Part.shape}".encode())
+                Hash.update(np.ascontiguousarray(Part).view(np.uint8).data)
+            else:
+                Hash.update(json.dumps(Part, default=str).encode())
+            Hash.update(b"|")
+
+        return Hash.hexdigest()
+
+    def Path(self, Key):
+
+        return os.path.join(self.Directory, Key + ".npz")
+
+    def Load(self, Key):
+
+        """
+
+        Read a stored entry as a dictionary of arrays, or None on a miss. A hit marks the entry as recently used.
+
+        """
+
+        Path = self.Path(Key)
+
+        try:
+            with np.load(Path) as Entry:
+                Arrays = {Name: Entry[Name] for Name in Entry.files}
+            os.utime(Path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+
+            # Missing, evicted by another process or truncated entry.
+
+            return None
+
+        return Arrays
+
+    def Save(self, Key, Arrays):
+
+        """
+
+        Store a dictionary of arrays under the key, then evict the least recently used entries above the size limit.
+
+        """
+
+        Handle, Temporary = tempfile.mkstemp(suffix=".tmp", dir=self.Directory)
+
+        try:
+            with os.fdopen(Handle, "wb") as File:
+                np.savez_compressed(File, **Arrays)
+            os.replace(Temporary, self.Path(Key))
+        except BaseException:
+            os.remove(Temporary)
+            raise
+
+        self.Evict()
+
+    def Fetch(self, Key, Compute):
+
+        """
+
+        Return the entry stored under the key, computing and storing it with Compute if missing.
+
+        """
+
+        Arrays = self.Load(Key)
+
+        if Arrays is None:
+            Arrays = Compute()
+            self.Save(Key, Arrays)
+
+        return Arrays
+
+    def Evict(self):
+
+        # Remove the least recently used entries until the cache fits in its size limit.
+
+        Entries = []
+
+        for Entry in os.scandir(self.Directory):
+            if Entry.name.endswith(".npz") and Entry.is_file():
+                try:
+                    Status = Entry.stat()
+                except OSError:
+                    continue
+                Entries.append((Status.st_mtime, Status.st_size, Entry.path))
+
+        Total = sum(Size for _, Size, _ in Entries)
+
+        for _, Size, Path in sorted(Entries):
+
+            if Total <= self.Max_Size:
+                break
+
+            try:
+                os.remove(Path)
+            except OSError:
+                pass
+
+            Total -= Size
+
+    def Clear(self):
+
+        # Remove every stored entry.
+
+        for Entry in os.scandir(self.Directory):
+            if Entry.name.endswith(".npz"):
+                try:
+                    os.remove(Entry.path)
+                except OSError:
+                    pass
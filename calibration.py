@@ -0,0 +1,360 @@
+"""
+
+Density-isovalue calibration tables of the TPMS equations.
+
+Usage:
+
+    python calibration.py --resolution 256 --points 201
+
+    For a whole number of periodic unit cells the relative density reached by an isovalue only depends on the equation
+    and the topology. The tables sample this curve once on a fine unit cell grid and are stored in "calibration.json",
+    so an isovalue and a tight Brent bracket can be served for the periodic cube without solving on the model field.
+
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import numpy as np
+from tpms_generator import Equation_Field, Compute_Wave_Functions, Threshold_Values, Solid_Counts, Count_Isovalue, Symmetric_Field, Field_Mask
+
+##################################################
+#          Density Calibration Functions         #
+##################################################
+
+# Bump whenever a change in the equations or in the table layout invalidates the stored tables.
+
+CALIBRATION_VERSION = 1
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration.json")
+
+EQUATIONS = ["Primitive", "Gyroid", "IWP", "Diamond", "Neovius", "FK-S"]
+
+TOPOLOGIES = ["Solid 1", "Solid 2", "Sheet"]
+
+##################################################
+#           Function: Unit_Cell_Values           #
+##################################################
+
+def Unit_Cell_Values(Equation, Topology, Resolution):
+
+    """
+
+    Sample the threshold values of one periodic unit cell at the cell centres of a regular grid, so every point
+    stands for the same volume.
+
+    Parameters:
+
+        - Equation [String]: The TPMS equation selection.
+        - Topology [String]: Equation condition.
+        - Resolution [Integer]: Number of samples along each dimension of the unit cell.
+
+    Returns:
+
+        - Values [numpy.Ndarray]: Sorted 1D array of the values compared against the isovalue.
+
+    """
+
+    Axis = (np.arange(Resolution) + 0.5) / Resolution
+    KX, KY, KZ = Compute_Wave_Functions(1, 1, 1, 1, 1, 1)
+
+    TPMS_Field = Equation_Field(Equation, Axis[:, None, None], Axis[None, :, None], Axis[None, None, :], KX, KY, KZ)
+    Values = np.sort(Threshold_Values(TPMS_Field.ravel(), Topology))
+
+    return Values
+
+##################################################
+#           Function: Values_Density             #
+##################################################
+
+def Values_Density(Values, Topology, Isovalue):
+
+    """
+
+    Relative density reached by each isovalue on sorted threshold values, counting the points of the solid part as
+    Field_Density_Value does.
+
+    Parameters:
+
+        - Values [numpy.Ndarray]: Sorted values returned by Unit_Cell_Values.
+        - Topology [String]: Equation condition.
+        - Isovalue [Float/numpy.Ndarray]: Constant isovalue, or a vector of them.
+
+    Returns:
+
+        - Density [Float/numpy.Ndarray]: Relative density for each isovalue.
+
+    """
+
+    Threshold = - np.asarray(Isovalue) if Topology == "Solid 2" else np.asarray(Isovalue)
+    Density = np.searchsorted(Values, Threshold, side='right') / Values.size
+
+    return Density
+
+##################################################
+#         Function: Calibration_Table            #
+##################################################
+
+def Calibration_Table(Equation, Topology, Resolution=256, Points=201):
+
+    """
+
+    Build the isovalue table of an equation and topology at evenly spaced relative densities.
+
+    Parameters:
+
+        - Equation [String]: The TPMS equation selection.
+        - Topology [String]: Equation condition.
+        - Resolution [Integer]: Number of unit cell samples along each dimension.
+        - Points [Integer]: Number of relative densities of the table, from 0 to 1.
+
+    Returns:
+
+        - Isovalues [numpy.Ndarray]: Isovalue of each table density.
+        - Error [Float]: Largest relative density error of the interpolated isovalues, adding the interpolation error
+          measured half way between the table densities and the sampling error against a grid of half resolution.
+
+    """
+
+    if Points < 2:
+        raise ValueError("Points must be an integer greater than 1")
+
+    Values = Unit_Cell_Values(Equation, Topology, Resolution)
+
+    # Isovalues on a grid twice as fine, the odd entries checking the interpolation of the even ones.
+
+    Densities = np.linspace(0.0, 1.0, 2 * Points - 1)
+    Count, Lower_Index, Upper_Index = Solid_Counts(Densities, Values.size)
+    Isovalues = Count_Isovalue(Count, Values.size, Values[Lower_Index], Values[Upper_Index], Topology)
+
+    Interpolated = 0.5 * (Isovalues[0:-1:2] + Isovalues[2::2])
+    Interpolation_Error = np.max(np.abs(Values_Density(Values, Topology, Interpolated) - Densities[1::2]))
+
+    # Sampling error of the unit cell grid, estimated from the density change on a coarser grid.
+
+    Coarse_Values = Unit_Cell_Values(Equation, Topology, Resolution // 2)
+    Sampling_Error = np.max(np.abs(Values_Density(Coarse_Values, Topology, Isovalues) - Values_Density(Values, Topology, Isovalues)))
+
+    return Isovalues[::2], float(Interpolation_Error + Sampling_Error)
+
+##################################################
+#          Function: Build_Calibration           #
+##################################################
+
+def Build_Calibration(Resolution=256, Points=201, Path=None):
+
+    """
+
+    Build the tables of every equation and topology and store them in the calibration file.
+
+    Parameters:
+
+        - Resolution [Integer]: Number of unit cell samples along each dimension.
+        - Points [Integer]: Number of relative densities of each table, from 0 to 1.
+        - Path [String]: Location of the calibration file. CALIBRATION_FILE if None.
+
+    Returns:
+
+        - Calibration [Dictionary]: Stored tables, as returned by Load_Calibration.
+
+    """
+
+    Calibration = {'Version': CALIBRATION_VERSION, 'Resolution': Resolution, 'Density': np.linspace(0.0, 1.0, Points).tolist(), 'Tables': {}}
+
+    for Equation in EQUATIONS:
+        for Topology in TOPOLOGIES:
+            Isovalues, Error = Calibration_Table(Equation, Topology, Resolution, Points)
+            Calibration['Tables'][f"{Equation}/{Topology}"] = {'Isovalue': Isovalues.tolist(), 'Error': Error}
+            print(f"{Equation} {Topology}: density error {Error:.2e}")
+
+    with open(CALIBRATION_FILE if Path is None else Path, "w") as File:
+        json.dump(Calibration, File, indent=1)
+
+    Load_Calibration.cache_clear()
+
+    return Calibration
+
+##################################################
+#          Function: Load_Calibration            #
+##################################################
+
+@functools.lru_cache(maxsize=None)
+def Load_Calibration(Path=None):
+
+    """
+
+    Read the calibration file once per process.
+
+    Parameters:
+
+        - Path [String]: Location of the calibration file. CALIBRATION_FILE if None.
+
+    Returns:
+
+        - Calibration [Dictionary]: Table densities and, for every "Equation/Topology" key, the table isovalues and
+          their relative density error.
+
+    """
+
+    with open(CALIBRATION_FILE if Path is None else Path) as File:
+        Calibration = json.load(File)
+
+    if Calibration.get('Version') != CALIBRATION_VERSION:
+        raise ValueError(f"Calibration file version {Calibration.get('Version')} does not match {CALIBRATION_VERSION}, rebuild it with calibration.py")
+
+    return Calibration
+
+##################################################
+#         Function: Calibrated_Isovalue          #
+##################################################
+
+def Calibrated_Isovalue(Equation, Topology, Density, Margin=0.01, Path=None):
+
+    """
+
+    Interpolate the isovalue of a relative density from the calibration tables, together with a bracket for the Brent
+    solver of Solve_Isovalue.
+
+    Parameters:
+
+        - Equation [String]: The TPMS equation selection.
+        - Topology [String]: Equation condition.
+        - Density [Float]: Desired model relative density.
+        - Margin [Float]: Relative density added on both sides of the bracket to the table error, covering the
+          deviation of a coarse model grid from the unit cell volume fraction.
+        - Path [String]: Location of the calibration file. CALIBRATION_FILE if None.
+
+    Returns:
+
+        - Isovalue [Float]: Interpolated isovalue.
+        - Bracket [Tuple]: Isovalues of the relative densities one error plus margin below and above the target.
+        - Error [Float]: Relative density error of the interpolated isovalue for a whole number of unit cells.
+
+    """
+
+    if not 0 <= Density <= 1:
+        raise ValueError("Density must be between 0 and 1.")
+
+    Calibration = Load_Calibration(Path)
+    Table = Calibration['Tables'].get(f"{Equation}/{Topology}")
+
+    if Table is None:
+        raise ValueError(f"No calibration table for {Equation} {Topology}")
+
+    Densities, Isovalues, Error = Calibration['Density'], Table['Isovalue'], Table['Error']
+    Width = Error + Margin
+
+    Isovalue = float(np.interp(Density, Densities, Isovalues))
+    Bracket = tuple(sorted(float(Value) for Value in np.interp([Density - Width, Density + Width], Densities, Isovalues)))
+
+    return Isovalue, Bracket, Error
+
+##################################################
+#          Function: Periodic_Cube               #
+##################################################
+
+def Periodic_Cube(Equation, Domain, XDomain, YDomain, ZDomain, KX, KY, KZ):
+
+    """
+
+    Check that the calibration tables describe a model: a tabulated equation in a cube domain filling the grid, apart
+    from the outer grid points left out by Generate_3D_Domain, with a whole number of unit cells along every axis.
+
+    Parameters:
+
+        - Equation [String]: The TPMS equation selection.
+        - Domain [numpy.Ndarray]: 3D binary mask of the domain.
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        - KX [Float]: Scalar value representing the wave value in X dimension.
+        - KY [Float]: Scalar value representing the wave value in Y dimension.
+        - KZ [Float]: Scalar value representing the wave value in Z dimension.
+
+    Returns:
+
+        - Periodic [Boolean]: Whether the tables apply.
+
+    """
+
+    if Equation not in EQUATIONS or not np.all(Domain[1:-1, 1:-1, 1:-1]):
+        return False
+
+    Cells = np.array([np.ptp(XDomain) * KX, np.ptp(YDomain) * KY, np.ptp(ZDomain) * KZ]) / (2 * np.pi)
+
+    # The Diamond Y cosine uses the X wave number, which only keeps the unit cell shape when both are equal.
+
+    if Equation == "Diamond" and not np.isclose(KX, KY):
+        return False
+
+    return bool(np.all(Cells >= 1 - 1e-6) and np.allclose(Cells, np.rint(Cells), rtol=0, atol=1e-6))
+
+##################################################
+#        Function: Table_Relative_Density        #
+##################################################
+
+def Table_Relative_Density(Equation, Domain, Topology, Density, XDomain, YDomain, ZDomain, KX, KY, KZ, Tolerance=0.01, Workers=1, Full_Output=False):
+
+    """
+
+    Table-only counterpart of Relative_Density for the periodic cube. The isovalue is interpolated from the
+    calibration tables instead of being solved on the field, accepting their stated relative density error.
+
+    Parameters:
+
+        - Equation [String]: The TPMS equation selection.
+        - Domain [numpy.Ndarray]: 3D binary mask of the domain.
+        - Topology [String]: Equation condition.
+        - Density [Float]: Desired model relative density.
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        - KX [Float]: Scalar value representing the wave value in X dimension.
+        - KY [Float]: Scalar value representing the wave value in Y dimension.
+        - KZ [Float]: Scalar value representing the wave value in Z dimension.
+        - Tolerance [Float]: Largest accepted relative density error of the table.
+        - Workers [Integer]: Number of threads evaluating the field. All the available processors are used if None.
+        - Full_Output [Boolean]: Return the table isovalue together with the mask.
+
+    Returns:
+
+        - Final_TPMS [numpy.Ndarray]: 3D array containing the TPMS calculated points inside the limiting 3D domain shape.
+        - Isovalue [Float]: Table isovalue, only returned if Full_Output is True.
+
+    """
+
+    if not Periodic_Cube(Equation, Domain, XDomain, YDomain, ZDomain, KX, KY, KZ):
+        raise ValueError("Calibration tables only apply to a cube domain with a whole number of unit cells.")
+
+    Isovalue, _, Error = Calibrated_Isovalue(Equation, Topology, Density)
+
+    if Error > Tolerance:
+        raise ValueError(f"Calibration table error {Error:.2e} exceeds the tolerance {Tolerance:.2e}")
+
+    Final_TPMS = Field_Mask(Symmetric_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers), Domain, Topology, Isovalue)
+
+    if Full_Output:
+        return Final_TPMS, Isovalue
+
+    return Final_TPMS
+
+##################################################
+#                 Function: Main                 #
+##################################################
+
+def Main(Arguments=None):
+
+    Parser = argparse.ArgumentParser(description="Build the density-isovalue calibration tables of the TPMS equations.")
+    Parser.add_argument("--resolution", type=int, default=256, help="Unit cell samples along each dimension.")
+    Parser.add_argument("--points", type=int, default=201, help="Relative densities of each table.")
+    Parser.add_argument("--output", default=CALIBRATION_FILE, help="Location of the calibration file.")
+    Arguments = Parser.parse_args(Arguments)
+
+    Build_Calibration(Arguments.resolution, Arguments.points, Arguments.output)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -47,18 +47,22 @@ import vtk
 from tpms_generator import *
 from mesh_generator import *
 from utils import Connectivity, Curvature, Pore_Analysis
+from pipeline import Generate_Model, Model_Graph, Run_Context, Cancel_Token, Pipeline_Cancelled
+from cache import Model_Cache
+from calibration import Table_Relative_Density
 ################################################################################################
 # UI modules import:
 from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QMessageBox, QFileDialog
 from PySide6.QtGui import QPixmap
-from PySide6.QtCore import QCoreApplication
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from vtkmodules.vtkRenderingCore import vtkRenderer, vtkPolyDataMapper, vtkActor
 from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkCellArray
-from vtkmodules.vtkCommonCore import vtkPoints, vtkIdList
+from vtkmodules.vtkCommonCore import vtkPoints
 from vtkmodules.vtkRenderingAnnotation import vtkAxesActor, vtkCubeAxesActor
 from vtkmodules.vtkInteractionWidgets import vtkOrientationMarkerWidget
 from vtkmodules.vtkCommonDataModel import vtkPolyData, VTK_TRIANGLE
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, get_vtk_to_numpy_typemap, VTK_ID_TYPE
 ################################################################################################
 # UI APP directory:
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -67,6 +71,63 @@ sys.path.append(ui_dir)
 from UIoutput import Ui_MainWindow
 ################################################################################################
 
+# Background worker running the TPMS pipeline and the model analysis.
+
+class Compute_Worker(QObject):
+    
+    Progress = Signal(str, int)
+    Meshed = Signal(object)
+    Failed = Signal(str)
+    Done = Signal()
+    
+    def __init__(self, Parameters, Graph, Cache=None):
+        
+        super(Compute_Worker, self).__init__()
+        
+        self.Parameters = Parameters
+        self.Graph = Graph
+        self.Cache = Cache
+        self.Token = Cancel_Token()
+
+    def Run(self):
+        
+        # Generate the model, hand the meshes to the window and run the topology statistics.
+        
+        try:
+            
+            Model = Generate_Model(self.Parameters, self.Progress.emit, self.Token, Cache=self.Cache, Graph=self.Graph)
+            self.Meshed.emit(Model)
+            
+            # TPMS and pore topology statistics, only run again when the model changed. 
+            
+            with self.Graph.Lock:
+                self.Graph.Evaluate("Analysis", self.Parameters, Run_Context(self.Progress.emit, self.Token))
+            
+        except Pipeline_Cancelled:
+            pass
+        except Exception as e:
+            self.Failed.emit(str(e))
+        finally:
+            self.Done.emit()
+
+# Model analysis stage, appended to the pipeline graph after the meshes.
+
+def Model_Analysis(Parameters, Get, Context):
+    
+    Model = Get("Threshold")
+    _, Length_Grid = Get("Grid")
+    Voxel_Size = np.divide(Length_Grid, Parameters['Resolution'] - 1)
+    
+    Context['Stage']("Pore analysis", 85)
+    Pore_Analysis(Model['TPMS'], Voxel_Size)
+    
+    Context['Stage']("Connectivity analysis", 90)
+    Connectivity(Model['TPMS'], Model['Domain'], Voxel_Size)
+    
+    Context['Stage']("Curvature analysis", 95)
+    Meshes = Get("Meshes")
+    Curvature(Meshes['TPMS_Vertices'], Meshes['TPMS_Faces'])
+
 # Main window UI function definitions.
 
 class MainWindow(QMainWindow, Ui_MainWindow):
@@ -115,6 +176,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Initialize visuals setup:
         
         self.meshData = None
+        self.Worker = None
+        self.Worker_Thread = None
+        self.Cache = Model_Cache()
+        self.Graph = Model_Graph()
+        self.Graph.Add("Analysis", Model_Analysis, Depends=["Grid", "Threshold", "Meshes"])
         self.Initialise_VTK_Components()
         self.Default_Model()
         print("Initialization complete.")
@@ -251,25 +317,30 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.Renderer.ResetCamera()
         Camera.ParallelProjectionOn()
 
-    def Display_Mesh(self, vertices, faces):
+    def Build_PolyData(self, Vertices, Faces):
         
-        # Display and render the TPMS model generated for a fast pre-visualisation.
-
-        self.Renderer.RemoveAllViewProps()
+        # Wrap the vertex and face arrays as VTK arrays without copying them or looping in Python.
+        
+        Vertices = np.ascontiguousarray(Vertices)
         Nodes = vtkPoints()
-        for vertex in vertices:
-            Nodes.InsertNextPoint(vertex.tolist())  
-
+        Nodes.SetData(numpy_to_vtk(Vertices, deep=False))
+        
+        Connectivity = np.ascontiguousarray(Faces, dtype=get_vtk_to_numpy_typemap()[VTK_ID_TYPE]).ravel()
+        Offsets = np.arange(0, Connectivity.size + 1, 3, dtype=Connectivity.dtype)
         Elements = vtkCellArray()
-        for face in faces:
-            idList = vtkIdList()
-            for vertexIndex in face:
-                idList.InsertNextId(vertexIndex)
-            Elements.InsertNextCell(idList)
-
+        Elements.SetData(numpy_to_vtkIdTypeArray(Offsets, deep=False), numpy_to_vtkIdTypeArray(Connectivity, deep=False))
+        
         Poly_Data = vtkPolyData()
         Poly_Data.SetPoints(Nodes)
         Poly_Data.SetPolys(Elements)
+        
+        return Poly_Data
+
+    def Display_Mesh(self, Poly_Data):
+        
+        # Display and render the TPMS model generated for a fast pre-visualisation.
+
+        self.Renderer.RemoveAllViewProps()
                 
         Mapper = vtkPolyDataMapper()
         Mapper.SetInputData(Poly_Data)
@@ -358,13 +429,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         NX, NY, NZ = 1, 1, 1  
         LX, LY, LZ = 1, 1, 1  
 
-        XDomain, YDomain, ZDomain = Generate_Grid_Domain(Length, Resolution)
+        XDomain, YDomain, ZDomain = Generate_Grid_Domain(Length, Resolution, Sparse=True)
         KX, KY, KZ = Compute_Wave_Functions(NX, NY, NZ, LX, LY, LZ)
-        Domain = Generate_3D_Domain("Cube", XDomain, YDomain, ZDomain, Length, Radius, InnerRadius)
-        TPMS = Relative_Density("Primitive", Domain, "Sheet", Density, XDomain, YDomain, ZDomain, KX, KY, KZ)
+        Domain = Parallel_3D_Domain("Cube", XDomain, YDomain, ZDomain, Length, Radius, InnerRadius, Workers=None)
+        TPMS = Table_Relative_Density("Primitive", Domain, "Sheet", Density, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers=None)
         Vertices, Faces = Generate_Mesh(TPMS, Length, Resolution)
 
-        self.Display_Mesh(Vertices, Faces)
+        self.Display_Mesh(self.Build_PolyData(Vertices, Faces))
 
     def Export(self):
         
@@ -396,9 +467,62 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         else:
             self.Show_Error("No mesh to export. Please compute the mesh first.")
             
+    def Show_Progress(self, Stage, Percent):
+        
+        # Display the pipeline stage running in the background.
+        
+        self.statusbar.showMessage(f"{Stage} ({Percent} %)")
+
+    def Show_Model(self, Model):
+        
+        # Save and display the meshes computed by the background worker.
+        
+        self.meshData = {
+            'TPMS_Vertices': Model['TPMS_Vertices'],
+            'TPMS_Faces': Model['TPMS_Faces'],
+            'Pores_Vertices': Model['Pores_Vertices'],
+            'Pores_Faces': Model['Pores_Faces']
+        }
+        
+        PolyData = self.Build_PolyData(Model['TPMS_Vertices'], Model['TPMS_Faces'])
+        
+        self.Display_Mesh(PolyData)
+        self.Mesh_Info(PolyData)
+
+    def Compute_Finished(self):
+        
+        # Release the background worker once its thread has stopped.
+        
+        if self.Worker.Token.Is_Cancelled():
+            self.statusbar.showMessage("Computation cancelled.", 5000)
+        else:
+            self.statusbar.clearMessage()
+        
+        self.Worker_Thread.deleteLater()
+        self.Worker.deleteLater()
+        self.Worker_Thread = None
+        self.Worker = None
+        self.pushButtonDisplay.setText(QCoreApplication.translate("MainWindow", "Display", None))
+
+    def closeEvent(self, event):
+        
+        # Stop a running computation before closing the window.
+        
+        if self.Worker_Thread is not None:
+            self.Worker.Token.Cancel()
+            self.Worker_Thread.quit()
+            self.Worker_Thread.wait()
+        
+        super(MainWindow, self).closeEvent(event)
+
     def Compute(self):
         
-        # Main function used to calculate and generate the TPMS model.
+        # Main function used to calculate and generate the TPMS model. Pressed again while running, it cancels the computation.
+        
+        if self.Worker_Thread is not None:
+            self.Worker.Token.Cancel()
+            self.statusbar.showMessage("Cancelling...")
+            return
         
         try:
             
@@ -428,88 +552,43 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
             except ValueError as e:
                 self.Show_Error(f"Invalid input value: {e}")
+                return
             except Exception as e:
                 self.Show_Error(f"An unexpected error occurred: {e}")
+                return
 
             Resolution = int(self.lineEditResolution.text())
             Density = float(self.lineEditDensity.text())
-            
-            Tpms_Type = self.comboBoxEquation.currentText()
-            Domain_Type = self.comboBoxDomain.currentText()
-            Topology_Type = self.comboBoxTopology.currentText()
-            Method_Type = self.comboBoxMethod.currentText()
-
-            Length_Grid = None
-            
-            if Length/2 >= Radius:
-                Length_Grid = Length
-            else:
-                Length_Grid = Radius*2
-            
-            if Domain_Type == "Cube":
-                Bounds = (Length, Length, Length)
-
-            elif Domain_Type == "Cuboid":
-                Bounds = (Radius, Radius, Length)
 
-            elif Domain_Type == "Sphere":
-                Bounds = (2*Radius, 2*Radius, 2*Radius)
-
-            elif Domain_Type == "Cylinder":
-                Bounds = (2*Radius, 2*Radius, Length)
-
-            elif Domain_Type == "Ring":
-                Bounds = (2*Radius, 2*Radius, Length)
-                
-            XDomain, YDomain, ZDomain = Generate_Grid_Domain(Length_Grid, Resolution)
-            KX, KY, KZ = Compute_Wave_Functions(NX, NY, NZ, LX, LY, LZ)
-            Domain = Generate_3D_Domain(Domain_Type, XDomain, YDomain, ZDomain, Length, Radius, InnerRadius)
-            
-            if Method_Type == 'Relative Density':
-                TPMS = Relative_Density(Tpms_Type, Domain, Topology_Type, Density, XDomain, YDomain, ZDomain, KX, KY, KZ)
-            elif Method_Type == 'Constant Isovalue':
-                TPMS = Isovalue_Mask(Tpms_Type, Domain, Topology_Type, Density, XDomain, YDomain, ZDomain, KX, KY, KZ)
-    
-            Vertices, Faces = Generate_Mesh(TPMS, Length_Grid, Resolution)
-            Vertices, Faces = Map_Mesh(Vertices, Faces, Bounds)
-
-            TPMS_Pores = - TPMS  
-            
-            Vertices_Pores, Faces_Pores = Generate_Mesh(TPMS_Pores, Length_Grid, Resolution)
-            Vertices_Pores, Faces_Pores = Map_Mesh(Vertices_Pores, Faces_Pores, Bounds)
-
-            self.meshData = {
-                'TPMS_Vertices': Vertices,
-                'TPMS_Faces': Faces,
-                'Pores_Vertices': Vertices_Pores,
-                'Pores_Faces': Faces_Pores
+            Parameters = {
+                'Equation': self.comboBoxEquation.currentText(),
+                'Domain': self.comboBoxDomain.currentText(),
+                'Topology': self.comboBoxTopology.currentText(),
+                'Method': self.comboBoxMethod.currentText(),
+                'Density': Density,
+                'Length': Length,
+                'Radius': Radius,
+                'InnerRadius': InnerRadius,
+                'Resolution': Resolution,
+                'NX': NX, 'NY': NY, 'NZ': NZ,
+                'LX': LX, 'LY': LY, 'LZ': LZ
             }
             
-            # Save the data mesh obtained.
-                        
-            PolyData = vtkPolyData()
-            Points = vtkPoints()
-            for vertex in Vertices:
-                Points.InsertNextPoint(vertex.tolist())
-            PolyData.SetPoints(Points)
-            Cells = vtkCellArray()
-            for face in Faces:
-                idList = vtkIdList()
-                for vertexIndex in face:
-                    idList.InsertNextId(vertexIndex)
-                Cells.InsertNextCell(idList)
-            PolyData.SetPolys(Cells)
-            
-            self.Display_Mesh(Vertices, Faces)
-            self.Mesh_Info(PolyData)
+            # Run the pipeline in a background thread so the window stays responsive.
             
-            Voxel_Size = np.divide(Length_Grid, (Resolution-1))
+            self.Worker_Thread = QThread()
+            self.Worker = Compute_Worker(Parameters, self.Graph, self.Cache)
+            self.Worker.moveToThread(self.Worker_Thread)
             
-            # TPMS and pore topology statistics. 
+            self.Worker_Thread.started.connect(self.Worker.Run)
+            self.Worker.Progress.connect(self.Show_Progress)
+            self.Worker.Meshed.connect(self.Show_Model)
+            self.Worker.Failed.connect(self.Show_Error)
+            self.Worker.Done.connect(self.Worker_Thread.quit)
+            self.Worker_Thread.finished.connect(self.Compute_Finished)
             
-            Pore_Analysis(TPMS, Voxel_Size)          
-            Connectivity(TPMS, Domain, Voxel_Size)
-            Curvature(Vertices, Faces)
+            self.pushButtonDisplay.setText(QCoreApplication.translate("MainWindow", "Cancel", None))
+            self.Worker_Thread.start()
 
         except ValueError as e:
             self.Show_Error(str(e))
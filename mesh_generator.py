@@ -1,8 +1,13 @@
+import os
+import tempfile
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from skimage.measure import marching_cubes
-from stl import mesh
-from vedo import Mesh
-import trimesh
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
 
 ##################################################
 #              TPMS Model Meshing                #
@@ -12,7 +17,7 @@ import trimesh
 #            Function: Generate_Mesh             #
 ##################################################
 
-def Generate_Mesh(TPMS, Length, Resolution):
+def Generate_Mesh(TPMS, Length, Resolution, Process=False, Workers=1, Period=None):
     
     """
 
@@ -24,6 +29,9 @@ def Generate_Mesh(TPMS, Length, Resolution):
     - TPMS [numpy.Ndarray]: A 3D array containing the TPMS calculated points inside the limiting 3D shape to fit a desired relative density.
     - Length [Float]: Edge distance. Parameter used to define X-Y-Z distance for "Cube" and Z for "Cuboid" and "Cylinder" 
     - Resolution [Integer]: The number of points along each dimension.
+    - Process [Boolean]: Post-process the mesh with Process_Mesh, welding vertices, removing degenerate faces and orienting the faces from the field gradient.
+    - Workers [Integer]: Number of processes meshing blocks of the field with Generate_Mesh_Blocks. All the available processors are used if None.
+    - Period [Tuple]: Unit cell size X - Y - Z in grid cubes of a periodic field, as returned by Tile_Period. The unit cell mesh is replicated as in Generate_Mesh_Tiled if given.
 
     Returns:
     
@@ -36,18 +44,1115 @@ def Generate_Mesh(TPMS, Length, Resolution):
     
     Spacing = np.divide(Length, Resolution - 1)
 
-    Vertices, Faces, _, _ = marching_cubes(TPMS, level=0, spacing=(Spacing, Spacing, Spacing), method="lewiner")
+    if Period is not None:
+        Vertices, Faces, _ = Tiled_Marching_Cubes(TPMS, Spacing, Period)
+    elif Workers == 1:
+        Vertices, Faces, _, _ = marching_cubes(TPMS, level=0, spacing=(Spacing, Spacing, Spacing), method="lewiner")
+        Vertices = Vertices.astype(TPMS.dtype, copy=False)
+    else:
+        Block_Size = -(-(TPMS.shape[0] - 1) // (4 * (os.cpu_count() if Workers is None else max(Workers, 1))))
+        Vertices, Faces = Block_Marching_Cubes(TPMS, Spacing, Block_Size, Workers)
+    
+    if Process:
+        Vertices, Faces = Process_Mesh(Vertices, Faces, TPMS, Spacing)
+        
+    print(f"Mesh generated with {Vertices.shape[0]} vertices and {Faces.shape[0]} faces.")
+
+    return Vertices, Faces
+
+##################################################
+#             Function: Process_Mesh             #
+##################################################
+
+def Process_Mesh(Vertices, Faces, TPMS=None, Spacing=1.0, Sign=1):
+    
+    """
+
+    Clean a marching cubes mesh: coincident vertices are welded, degenerate faces removed and, given the scalar field, the faces are wound so their normals point down the field gradient, out of the positive region.
+ 
+    Parameters:
+
+    - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+    - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh.
+    - TPMS [numpy.Ndarray]: Optional 3D scalar field the mesh was extracted from. The winding is left unchanged if None.
+    - Spacing [Float]: Grid spacing of the field.
+    - Sign [Integer]: Use -1 when the mesh was extracted from the negated field.
+
+    Returns:
+    
+    - Vertices [numpy.Ndarray]: Array containing the welded vertices.
+    - Faces [numpy.Ndarray]: Array containing the non-degenerate, consistently wound faces.
+
+    """
+    
+    # Vertex welding.
+    
+    Vertices, Vertex_Index = Merge_Vertices(Vertices)
+    Faces = Vertex_Index[Faces]
+    
+    # Degenerate faces: repeated vertices or zero area.
+    
+    Normals = np.cross(Vertices[Faces[:, 1]] - Vertices[Faces[:, 0]], Vertices[Faces[:, 2]] - Vertices[Faces[:, 0]])
+    Valid = (Faces[:, 0] != Faces[:, 1]) & (Faces[:, 1] != Faces[:, 2]) & (Faces[:, 2] != Faces[:, 0]) & np.any(Normals != 0, axis=1)
+    Faces, Normals = Faces[Valid], Normals[Valid]
+    
+    # Winding from the field gradient sign at the face centroids. Marching cubes winds all faces consistently, so the
+    # faces vote on the side and are reversed together, as the gradient is unreliable on single faces next to the zero caps.
+    
+    if TPMS is not None and Faces.shape[0] > 0:
+        Gradient = Field_Gradient(TPMS, Vertices[Faces].mean(axis=1) / Spacing)
+        Vote = np.sign(np.einsum('ij,ij->i', Normals, Gradient)).sum()
+        if Sign * Vote > 0:
+            Faces = Faces[:, ::-1]
+    
+    # Drop the vertices left unused.
+    
+    Used = np.zeros(Vertices.shape[0], dtype=bool)
+    Used[Faces] = True
+    Vertices, Faces = Compact_Mesh(Vertices, Faces, Used)
+
+    return Vertices, Faces
+
+##################################################
+#            Function: Merge_Vertices            #
+##################################################
+
+def Merge_Vertices(Vertices):
+    
+    """
+
+    Merge the vertices sharing exactly the same position.
+ 
+    Parameters:
+
+    - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh.
+
+    Returns:
+    
+    - Unique_Vertices [numpy.Ndarray]: Array containing the distinct vertices, in lexicographic order.
+    - Vertex_Index [numpy.Ndarray]: Index of every input vertex into the distinct vertices.
+
+    """
+    
+    Order = np.lexsort(Vertices.T[::-1])
+    Sorted = Vertices[Order]
+    
+    New_Position = np.ones(Sorted.shape[0], dtype=bool)
+    New_Position[1:] = np.any(Sorted[1:] != Sorted[:-1], axis=1)
+    
+    Vertex_Index = np.empty(Sorted.shape[0], dtype=np.int64)
+    Vertex_Index[Order] = np.cumsum(New_Position) - 1
+    
+    return Sorted[New_Position], Vertex_Index
+
+##################################################
+#            Function: Field_Gradient            #
+##################################################
+
+def Field_Gradient(TPMS, Points):
+    
+    """
+
+    Gradient of the trilinear interpolation of a scalar field, the surface approximated by marching cubes.
+ 
+    Parameters:
+
+    - TPMS [numpy.Ndarray]: 3D scalar field.
+    - Points [numpy.Ndarray]: Array containing 'n' points in grid index units.
+
+    Returns:
+    
+    - Gradient [numpy.Ndarray]: Array containing the field gradient at every point, in grid index units.
+
+    """
+    
+    Upper = np.array(TPMS.shape) - 2
+    Corner = np.clip(np.floor(Points).astype(np.int64), 0, Upper)
+    FX, FY, FZ = (Points - Corner).T
+    I, J, K = Corner.T
+    
+    def Value(DX, DY, DZ):
+        return TPMS[I + DX, J + DY, K + DZ].astype(np.float64)
+    
+    V000, V100, V010, V001 = Value(0, 0, 0), Value(1, 0, 0), Value(0, 1, 0), Value(0, 0, 1)
+    V110, V101, V011, V111 = Value(1, 1, 0), Value(1, 0, 1), Value(0, 1, 1), Value(1, 1, 1)
+    
+    GX = (1 - FY) * (1 - FZ) * (V100 - V000) + FY * (1 - FZ) * (V110 - V010) + (1 - FY) * FZ * (V101 - V001) + FY * FZ * (V111 - V011)
+    GY = (1 - FX) * (1 - FZ) * (V010 - V000) + FX * (1 - FZ) * (V110 - V100) + (1 - FX) * FZ * (V011 - V001) + FX * FZ * (V111 - V101)
+    GZ = (1 - FX) * (1 - FY) * (V001 - V000) + FX * (1 - FY) * (V101 - V100) + (1 - FX) * FY * (V011 - V010) + FX * FY * (V111 - V110)
+    
+    return np.stack([GX, GY, GZ], axis=1)
+
+##################################################
+#         Function: Generate_Mesh_Blocks         #
+##################################################
+
+def Generate_Mesh_Blocks(TPMS, Length, Resolution, Block_Size=64, Workers=1):
+    
+    """
+
+    Creates the TPMS mesh running the marching cubes algorithm block by block along the first axis.
+    Only a few blocks of the scalar field are loaded at a time, so memory-mapped fields are never read whole.
+    Consecutive blocks share one plane of points and the vertices generated on it are welded, giving the same mesh as a single marching cubes run.
+    Blocks can be meshed in parallel worker processes, as the marching cubes implementation holds the global interpreter lock.
+ 
+    Parameters:
+
+    - TPMS [numpy.Ndarray/numpy.Memmap]: A 3D array containing the TPMS calculated points inside the limiting 3D shape to fit a desired relative density.
+    - Length [Float]: Edge distance. Parameter used to define X-Y-Z distance for "Cube" and Z for "Cuboid" and "Cylinder" 
+    - Resolution [Integer]: The number of points along each dimension.
+    - Block_Size [Integer]: The number of cubes along the first axis meshed per block.
+    - Workers [Integer]: Number of worker processes. All the available processors are used if None.
+
+    Returns:
+    
+    - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+    - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh. Each face is defined by indices that point to the vertices array, specifying the vertices that form each triangle.
+
+    """
+    
+    Vertices, Faces = Block_Marching_Cubes(TPMS, np.divide(Length, Resolution - 1), Block_Size, Workers)
+        
+    print(f"Mesh generated with {Vertices.shape[0]} vertices and {Faces.shape[0]} faces.")
+
+    return Vertices, Faces
+
+##################################################
+#         Function: Block_Marching_Cubes         #
+##################################################
+
+def Block_Marching_Cubes(TPMS, Spacing, Block_Size=64, Workers=1):
+    
+    """
+    
+    Run the marching cubes algorithm block by block along the first axis and weld the shared planes.
+    
+    Parameters:
+    
+        - TPMS [numpy.Ndarray/numpy.Memmap]: 3D scalar field.
+        - Spacing [Float]: Grid spacing.
+        - Block_Size [Integer]: The number of cubes along the first axis meshed per block.
+        - Workers [Integer]: Number of worker processes. All the available processors are used if None.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the mesh, in the field precision.
+        - Faces [numpy.Ndarray]: Array containing the triangular faces of the mesh.
+    
+    """
+    
+    if Block_Size is None or Block_Size <= 0:
+        raise ValueError("Block size must be a positive integer")
+    
+    Workers = os.cpu_count() if Workers is None else Workers
+    
+    if Workers <= 0:
+        raise ValueError("Workers must be a positive integer")
+    
+    Vertices_List, Faces_List, Planes = [], [], []
+    Offset = 0
+    
+    # Marching cubes per block, sharing the boundary plane with the next block.
+    
+    for Start, End, Block_Vertices, Block_Faces in Mesh_Blocks(TPMS, Block_Size, Workers):
+        
+        Planes.append((Start, Offset + np.flatnonzero(Block_Vertices[:, 0] == 0), End, Offset + np.flatnonzero(Block_Vertices[:, 0] == End - Start)))
+        Block_Vertices[:, 0] += Start
+        
+        Vertices_List.append(Block_Vertices)
+        Faces_List.append(Block_Faces.astype(np.int64) + Offset)
+        Offset += Block_Vertices.shape[0]
+
+    if Offset == 0:
+        raise RuntimeError("No surface found at the given iso value.")
+    
+    Vertices = np.concatenate(Vertices_List)
+    Faces = np.concatenate(Faces_List)
+    
+    # Weld the vertices of each shared plane.
+    
+    Remap = np.arange(Offset)
+    
+    for Previous, Current in zip(Planes[:-1], Planes[1:]):
+        if Previous[2] == Current[0]:
+            Weld_Plane(Vertices, Remap, Previous[3], Current[1])
+
+    Vertices, Faces = Compact_Mesh(Vertices, Remap[Faces], Remap == np.arange(Offset))
+    Vertices = (Vertices * Spacing).astype(TPMS.dtype, copy=False)
+
+    return Vertices, Faces
+
+##################################################
+#              Function: Mesh_Blocks             #
+##################################################
+
+def Mesh_Blocks(TPMS, Block_Size, Workers=1):
+    
+    """
+    
+    Generate the marching cubes mesh of every block holding a surface, in block order.
+    With several workers, at most two blocks per worker are read and in flight at any time.
+    
+    Parameters:
+    
+        - TPMS [numpy.Ndarray/numpy.Memmap]: 3D scalar field.
+        - Block_Size [Integer]: The number of cubes along the first axis meshed per block.
+        - Workers [Integer]: Number of worker processes.
+        
+    Yields:
+    
+        - Start, End [Integer]: First and last plane of the block.
+        - Vertices [numpy.Ndarray]: Block vertices in grid index units, relative to the first plane.
+        - Faces [numpy.Ndarray]: Block faces.
+    
+    """
+    
+    Size = TPMS.shape[0]
+    Ranges = [(Start, min(Start + Block_Size, Size - 1)) for Start in range(0, Size - 1, Block_Size)]
+    
+    if Workers == 1:
+        for Start, End in Ranges:
+            Mesh = Mesh_Block(np.asarray(TPMS[Start:End + 1]))
+            if Mesh is not None:
+                yield (Start, End) + Mesh
+        return
+    
+    with ProcessPoolExecutor(max_workers=Workers) as Executor:
+        
+        Pending = deque()
+        
+        for Start, End in Ranges:
+            
+            Pending.append((Start, End, Executor.submit(Mesh_Block, np.asarray(TPMS[Start:End + 1]))))
+            
+            while len(Pending) >= 2 * Workers or (Pending and Pending[0][2].done()):
+                Block_Start, Block_End, Future = Pending.popleft()
+                Mesh = Future.result()
+                if Mesh is not None:
+                    yield (Block_Start, Block_End) + Mesh
+        
+        while Pending:
+            Block_Start, Block_End, Future = Pending.popleft()
+            Mesh = Future.result()
+            if Mesh is not None:
+                yield (Block_Start, Block_End) + Mesh
+
+##################################################
+#              Function: Mesh_Block              #
+##################################################
+
+def Mesh_Block(Block):
+    
+    """
+    
+    Run the marching cubes algorithm on one block of the scalar field.
+    
+    Parameters:
+    
+        - Block [numpy.Ndarray]: 3D block of the scalar field.
+        
+    Returns:
+    
+        - Mesh [Tuple]: Vertices and faces of the block in grid index units, or None if the block holds no surface.
+    
+    """
+    
+    if not (np.any(Block > 0) and np.any(Block <= 0)):
+        return None
+    
+    Vertices, Faces, _, _ = marching_cubes(Block, level=0, method="lewiner")
+    
+    return Vertices, Faces
+
+##################################################
+#             Function: Weld_Plane               #
+##################################################
+
+def Weld_Plane(Vertices, Remap, Kept, Merged):
+    
+    """
+    
+    Map the vertices of a shared plane generated by one block onto the identical vertices generated by the neighbour block.
+    The two in-plane coordinates are hashed into one integer key per vertex, which identifies the grid edge holding it.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of all blocks.
+        - Remap [numpy.Ndarray]: Vertex index map, updated in place.
+        - Kept [numpy.Ndarray]: Indices of the plane vertices of the first block.
+        - Merged [numpy.Ndarray]: Indices of the plane vertices of the second block.
         
+    Returns:
+    
+        - Nothing.
+    
+    """
+    
+    if Kept.size == 0 or Merged.size == 0:
+        return
+    
+    Kept_Keys = Plane_Keys(Vertices[Kept])
+    Order = np.argsort(Kept_Keys, kind='stable')
+    Kept_Keys = Kept_Keys[Order]
+    
+    Merged_Keys = Plane_Keys(Vertices[Merged])
+    Position = np.clip(np.searchsorted(Kept_Keys, Merged_Keys), 0, Kept_Keys.size - 1)
+    Match = Kept_Keys[Position] == Merged_Keys
+    
+    Remap[Merged[Match]] = Kept[Order[Position[Match]]]
+
+##################################################
+#              Function: Plane_Keys              #
+##################################################
+
+def Plane_Keys(Vertices):
+    
+    """
+    
+    Hash the two in-plane coordinates of vertices lying on a plane of constant first coordinate into one integer key.
+    The key is exact, so it identifies the grid edge holding every vertex.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the plane.
+        
+    Returns:
+    
+        - Keys [numpy.Ndarray]: Unsigned 64 bits key of every vertex.
+    
+    """
+    
+    Coordinates = np.ascontiguousarray(Vertices[:, 1:], dtype=np.float32).view(np.uint32).astype(np.uint64)
+    
+    return (Coordinates[:, 0] << np.uint64(32)) | Coordinates[:, 1]
+
+##################################################
+#             Function: Compact_Mesh             #
+##################################################
+
+def Compact_Mesh(Vertices, Faces, Keep):
+    
+    """
+    
+    Remove the vertices not kept and renumber the faces accordingly.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh.
+        - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh, only referencing kept vertices.
+        - Keep [numpy.Ndarray]: Boolean array marking the vertices to keep.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the kept vertices.
+        - Faces [numpy.Ndarray]: Array containing the renumbered faces.
+    
+    """
+    
+    New_Index = np.cumsum(Keep) - 1
+    
+    Vertices = Vertices[Keep]
+    Faces = New_Index[Faces]
+    
+    return Vertices, Faces
+
+##################################################
+#         Function: Generate_Solid_Pores         #
+##################################################
+
+def Generate_Solid_Pores(TPMS, Length, Resolution, Process=False):
+    
+    """
+
+    Creates the solid and pore meshes of a TPMS with a single marching cubes pass over the scalar field.
+    Inside the domain the pore surface is the solid surface with reversed orientation, so it is extracted once from the cubes whose corners are all non-zero.
+    Only the cubes touching the zero values outside the domain are meshed for each side, generating the differing cap geometry, which is then welded to the shared surface.
+ 
+    Parameters:
+
+    - TPMS [numpy.Ndarray]: A 3D array containing the TPMS calculated points inside the limiting 3D shape to fit a desired relative density.
+    - Length [Float]: Edge distance. Parameter used to define X-Y-Z distance for "Cube" and Z for "Cuboid" and "Cylinder" 
+    - Resolution [Integer]: The number of points along each dimension.
+    - Process [Boolean]: Post-process both meshes with Process_Mesh.
+
+    Returns:
+    
+    - Vertices [numpy.Ndarray]: Array containing the vertices of the solid mesh.
+    - Faces [numpy.Ndarray]: Array containing the triangular faces of the solid mesh.
+    - Vertices_Pores [numpy.Ndarray]: Array containing the vertices of the pore mesh.
+    - Faces_Pores [numpy.Ndarray]: Array containing the triangular faces of the pore mesh.
+
+    """
+    
+    Spacing = np.divide(Length, Resolution - 1)
+    Volume = np.ascontiguousarray(TPMS, dtype=np.float32)
+    
+    # Cubes with at least one zero corner, where the solid and pore surfaces differ.
+    
+    Zero = Volume == 0
+    Cap_Cubes = np.zeros(tuple(Size - 1 for Size in Volume.shape), dtype=bool)
+    
+    for DX in (0, 1):
+        for DY in (0, 1):
+            for DZ in (0, 1):
+                Cap_Cubes |= Zero[DX:DX + Cap_Cubes.shape[0], DY:DY + Cap_Cubes.shape[1], DZ:DZ + Cap_Cubes.shape[2]]
+    
+    del Zero
+    
+    # Shared surface of the remaining cubes, then the solid and pore caps.
+    
+    Vertices_Shared, Faces_Shared = Masked_Marching_Cubes(Volume, ~Cap_Cubes, Spacing)
+    Vertices_Solid, Faces_Solid = Masked_Marching_Cubes(Volume, Cap_Cubes, Spacing)
+    Vertices_Pores, Faces_Pores = Masked_Marching_Cubes(- Volume, Cap_Cubes, Spacing)
+    
+    Index = Vertex_Index(Vertices_Shared)
+    Vertices, Faces = Weld_Caps(Vertices_Shared, Faces_Shared, Vertices_Solid, Faces_Solid, Index)
+    Vertices_Pores, Faces_Pores = Weld_Caps(Vertices_Shared, Faces_Shared[:, ::-1], Vertices_Pores, Faces_Pores, Index)
+    
+    if Faces.shape[0] == 0 or Faces_Pores.shape[0] == 0:
+        raise RuntimeError("No surface found at the given iso value.")
+    
+    Vertices = Vertices.astype(TPMS.dtype, copy=False)
+    Vertices_Pores = Vertices_Pores.astype(TPMS.dtype, copy=False)
+    
+    if Process:
+        Vertices, Faces = Process_Mesh(Vertices, Faces, Volume, Spacing)
+        Vertices_Pores, Faces_Pores = Process_Mesh(Vertices_Pores, Faces_Pores, Volume, Spacing, Sign=-1)
+    
     print(f"Mesh generated with {Vertices.shape[0]} vertices and {Faces.shape[0]} faces.")
+    print(f"Mesh generated with {Vertices_Pores.shape[0]} vertices and {Faces_Pores.shape[0]} faces.")
+
+    return Vertices, Faces, Vertices_Pores, Faces_Pores
+
+##################################################
+#        Function: Masked_Marching_Cubes         #
+##################################################
+
+def Masked_Marching_Cubes(Volume, Cubes, Spacing):
+    
+    """
+    
+    Run the marching cubes algorithm on the selected cubes only. No surface found returns an empty mesh.
+    
+    Parameters:
+    
+        - Volume [numpy.Ndarray]: 3D float32 scalar field, meshed at the zero level.
+        - Cubes [numpy.Ndarray]: Boolean array marking the cubes to mesh by their lowest corner.
+        - Spacing [Float]: Grid spacing.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the mesh.
+        - Faces [numpy.Ndarray]: Array containing the triangular faces of the mesh.
+    
+    """
+    
+    Empty = np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int64)
+    
+    if not Cubes.any() or Volume.min() > 0 or Volume.max() <= 0:
+        return Empty
+    
+    # The mask entry of a point selects the cube whose highest corner it is.
+    
+    Mask = np.zeros(Volume.shape, dtype=bool)
+    Mask[1:, 1:, 1:] = Cubes
+    
+    try:
+        Vertices, Faces, _, _ = marching_cubes(Volume, level=0, spacing=(Spacing, Spacing, Spacing), mask=Mask, method="lewiner")
+    except RuntimeError:
+        return Empty
+    
+    return Vertices, Faces.astype(np.int64)
+
+##################################################
+#             Function: Vertex_Keys              #
+##################################################
+
+def Vertex_Keys(Vertices):
+    
+    """
+    
+    Hash the float32 coordinates of every vertex into one integer key. Different positions may share a key, so matches must be checked.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh.
+        
+    Returns:
+    
+        - Keys [numpy.Ndarray]: Unsigned 64 bits key of every vertex.
+    
+    """
+    
+    Bits = np.ascontiguousarray(Vertices, dtype=np.float32).view(np.uint32).astype(np.uint64)
+    
+    return (Bits[:, 0] * np.uint64(0x9E3779B97F4A7C15)) ^ (Bits[:, 1] * np.uint64(0xC2B2AE3D27D4EB4F)) ^ Bits[:, 2]
+
+##################################################
+#             Function: Vertex_Index             #
+##################################################
+
+def Vertex_Index(Vertices):
+    
+    """
+    
+    Build a lookup index of the vertices of a mesh by their coordinates.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh.
+        
+    Returns:
+    
+        - Keys [numpy.Ndarray]: Sorted coordinate keys.
+        - Order [numpy.Ndarray]: Vertex of every sorted key.
+    
+    """
+    
+    Keys = Vertex_Keys(Vertices)
+    Order = np.argsort(Keys)
+    
+    return Keys[Order], Order
+
+##################################################
+#              Function: Weld_Caps               #
+##################################################
+
+def Weld_Caps(Vertices, Faces, Vertices_Caps, Faces_Caps, Index=None):
+    
+    """
+    
+    Join the cap geometry to the shared surface, mapping every cap vertex onto the identical shared vertex when there is one.
+    Both meshes compute the vertices of their common grid edges from the same values, so the coordinates match exactly.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the shared surface.
+        - Faces [numpy.Ndarray]: Array containing the faces of the shared surface.
+        - Vertices_Caps [numpy.Ndarray]: Array containing the vertices of the caps.
+        - Faces_Caps [numpy.Ndarray]: Array containing the faces of the caps.
+        - Index [Tuple]: Lookup index of the shared vertices returned by Vertex_Index, built if None.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the joined mesh.
+        - Faces [numpy.Ndarray]: Array containing the faces of the joined mesh.
+    
+    """
+    
+    Number = Vertices.shape[0]
+    
+    if Number == 0 or Vertices_Caps.shape[0] == 0:
+        return np.concatenate([Vertices, Vertices_Caps]), np.concatenate([Faces, Faces_Caps + Number])
+    
+    # Look the cap vertices up by key, checking the coordinates of every match.
+    
+    Keys, Order = Vertex_Index(Vertices) if Index is None else Index
+    
+    Position = np.clip(np.searchsorted(Keys, Vertex_Keys(Vertices_Caps)), 0, Number - 1)
+    Candidate = Order[Position]
+    Match = np.all(Vertices[Candidate] == Vertices_Caps, axis=1)
+    
+    # Unmatched cap vertices are appended after the shared ones.
+    
+    Remap = np.empty(Vertices_Caps.shape[0], dtype=np.int64)
+    Remap[Match] = Candidate[Match]
+    Remap[~Match] = Number + np.arange(np.count_nonzero(~Match))
+    
+    Vertices = np.concatenate([Vertices, Vertices_Caps[~Match]])
+    Faces = np.concatenate([Faces, Remap[Faces_Caps]])
+    
+    return Vertices, Faces
+
+##################################################
+#           Function: Generate_Mesh_Tiled        #
+##################################################
+
+def Generate_Mesh_Tiled(TPMS, Length, Resolution, Period, Tolerance=1e-6):
+    
+    """
+
+    Creates the mesh of a periodic TPMS by meshing one unit cell and replicating it across the lattice.
+    The unit cell mesh is instanced in every cell whose values repeat those of the unit cell, within the relative tolerance.
+    The cells clipped by the domain keep the unit cell faces of their repeated cubes, and their other cubes are meshed explicitly and welded to the instances by grid edge.
+    The result matches the marching cubes mesh of the whole field, with the coincident vertices generated at zero-valued points merged, up to the triangulation of the cubes holding values within the tolerance of zero.
+ 
+    Parameters:
+
+    - TPMS [numpy.Ndarray]: A 3D array containing the TPMS calculated points inside the limiting 3D shape to fit a desired relative density.
+    - Length [Float]: Edge distance. Parameter used to define X-Y-Z distance for "Cube" and Z for "Cuboid" and "Cylinder" 
+    - Resolution [Integer]: The number of points along each dimension.
+    - Period [Tuple]: Unit cell size X - Y - Z in grid cubes, as returned by Tile_Period.
+    - Tolerance [Float]: Largest difference between the values of a cube and the unit cell, relative to the largest field value.
 
-    Mesh = trimesh.Trimesh(vertices=Vertices, faces=Faces, process=True)
+    Returns:
+    
+    - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+    - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh. Each face is defined by indices that point to the vertices array, specifying the vertices that form each triangle.
 
-    # Fix mesh face normals.
+    """
     
-    Mesh.fix_normals()
+    Spacing = np.divide(Length, Resolution - 1)
+    Vertices, Faces, Number_Cells = Tiled_Marching_Cubes(TPMS, Spacing, Period, Tolerance)
+        
+    print(f"Mesh generated with {Vertices.shape[0]} vertices and {Faces.shape[0]} faces from {Number_Cells} unit cell instances.")
 
     return Vertices, Faces
 
+##################################################
+#         Function: Tiled_Marching_Cubes         #
+##################################################
+
+def Tiled_Marching_Cubes(TPMS, Spacing, Period, Tolerance=1e-6):
+    
+    """
+    
+    Run the marching cubes algorithm on one unit cell, instance its mesh in every repeated cell and mesh the other cubes
+    explicitly. The field is compared to the unit cell one slab of cells at a time, so no temporary spans the grid.
+    
+    Parameters:
+    
+        - TPMS [numpy.Ndarray]: 3D scalar field.
+        - Spacing [Float]: Grid spacing.
+        - Period [Tuple]: Unit cell size X - Y - Z in grid cubes.
+        - Tolerance [Float]: Largest difference between the values of a cube and the unit cell, relative to the largest field value.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the vertices of the mesh, in the field precision.
+        - Faces [numpy.Ndarray]: Array containing the triangular faces of the mesh.
+        - Number_Cells [Integer]: Number of unit cell instances.
+    
+    """
+    
+    Period = np.asarray(Period, dtype=np.int64)
+    
+    if Period.shape != (3,) or np.any(Period <= 0):
+        raise ValueError("Period must hold three positive integers")
+    
+    Volume = np.ascontiguousarray(TPMS, dtype=np.float32)
+    Cubes = np.array(Volume.shape) - 1
+    Cells = Cubes // Period
+    
+    if np.any(Cells == 0):
+        
+        # Grid smaller than a unit cell.
+        
+        Vertices, Faces, _, _ = marching_cubes(TPMS, level=0, spacing=(Spacing, Spacing, Spacing), method="lewiner")
+        return Vertices.astype(TPMS.dtype, copy=False), Faces, 0
+    
+    # Unit cell, taken from the whole cell with the most values inside the domain. The cells, closed by their upper
+    # planes, are a strided view of the field.
+    
+    Windows = np.lib.stride_tricks.as_strided(Volume, shape=(Cells[0], Period[0] + 1, Cells[1], Period[1] + 1, Cells[2], Period[2] + 1), strides=np.repeat(Volume.strides, 2) * np.array([Period[0], 1, Period[1], 1, Period[2], 1]), writeable=False)
+    Filled = np.stack([np.count_nonzero(Windows[Slab], axis=(0, 2, 4)) for Slab in range(Cells[0])])
+    Start = np.unravel_index(np.argmax(Filled), Filled.shape)
+    Unit = Windows[Start[0], :, Start[1], :, Start[2], :].copy()
+    Limit = Tolerance * max(float(np.abs(Unit).max()), np.finfo(np.float32).tiny)
+    
+    Cell_Vertices, Cell_Faces, Face_Cubes, Plane_Maps = Mesh_Unit_Cell(Unit, Period)
+    Face_Cubes = np.ravel_multi_index(tuple(Face_Cubes.T), tuple(Period))
+    
+    if Plane_Maps is None or any(np.abs(Unit.take(0, Axis) - Unit.take(-1, Axis)).max() > Limit for Axis in range(3)):
+        
+        # Non-periodic unit cell, the whole field is meshed.
+        
+        Vertices, Faces, _, _ = marching_cubes(TPMS, level=0, spacing=(Spacing, Spacing, Spacing), method="lewiner")
+        return Vertices.astype(TPMS.dtype, copy=False), Faces, 0
+    
+    # Every slab of cells is compared to the unit cell repeated along the other axes. Cubes whose eight corners repeat
+    # the unit cell within the tolerance keep the unit cell faces, and the cells they fill are instanced whole.
+    
+    Tiles = -(-Cubes // Period)
+    Reference = Unit[np.ix_(np.arange(Period[0] + 1), np.arange(Volume.shape[1]) % Period[1], np.arange(Volume.shape[2]) % Period[2])]
+    Cube_Match = np.zeros((Period[0], Tiles[1] * Period[1], Tiles[2] * Period[2]), dtype=bool)
+    Instances, Partial, Partial_Faces = [], [], []
+    Explicit_Vertices, Explicit_Faces, Number_Explicit = [], [], 0
+    
+    for Slab in range(Tiles[0]):
+        
+        Slab_Low = Slab * Period[0]
+        Slab_Size = min(Period[0], Cubes[0] - Slab_Low)
+        Matching = np.abs(Volume[Slab_Low:Slab_Low + Slab_Size + 1] - Reference[:Slab_Size + 1]) <= Limit
+        
+        Cube_Match[:] = False
+        Cube_Match[:Slab_Size, :Cubes[1], :Cubes[2]] = Matching[:-1, :-1, :-1]
+        
+        for DX, DY, DZ in list(np.ndindex(2, 2, 2))[1:]:
+            Cube_Match[:Slab_Size, :Cubes[1], :Cubes[2]] &= Matching[DX:DX + Slab_Size, DY:DY + Cubes[1], DZ:DZ + Cubes[2]]
+        
+        Tile_Match = np.ascontiguousarray(Cube_Match.reshape(Period[0], Tiles[1], Period[1], Tiles[2], Period[2]).transpose(1, 3, 0, 2, 4))
+        Repeated = Tile_Match.all(axis=(2, 3, 4))
+        Instances.append(np.column_stack([np.full(np.count_nonzero(Repeated), Slab), np.argwhere(Repeated)]))
+        
+        # The other cells, clipped by the domain or by the grid, keep the faces of their repeated cubes, and only the
+        # bounding box of their other cubes is meshed explicitly.
+        
+        for TY, TZ in np.argwhere(~Repeated):
+            
+            Tile = np.array([Slab, TY, TZ])
+            Low = Tile * Period
+            Size = np.minimum(Period, Cubes - Low)
+            Cell_Match = Tile_Match[TY, TZ]
+            
+            if Cell_Match.any():
+                Partial.append(Tile)
+                Partial_Faces.append(Cell_Match.ravel()[Face_Cubes])
+            
+            Cell_Match = Cell_Match[:Size[0], :Size[1], :Size[2]]
+            
+            if Cell_Match.all():
+                continue
+            
+            Box = np.argwhere(~Cell_Match)
+            Lower, Upper = Box.min(axis=0), Box.max(axis=0) + 1
+            Box_Low = Low + Lower
+            
+            Piece_Vertices, Piece_Faces = Masked_Marching_Cubes(Volume[Box_Low[0]:Low[0] + Upper[0] + 1, Box_Low[1]:Low[1] + Upper[1] + 1, Box_Low[2]:Low[2] + Upper[2] + 1], ~Cell_Match[Lower[0]:Upper[0], Lower[1]:Upper[1], Lower[2]:Upper[2]], 1.0)
+            Explicit_Vertices.append(Piece_Vertices.astype(np.float64) + Box_Low)
+            Explicit_Faces.append(Piece_Faces + Number_Explicit)
+            Number_Explicit += Piece_Vertices.shape[0]
+    
+    # Instances of the unit cell mesh, welded to their upper neighbours. Vertices on cell edges and corners are welded
+    # through up to three planes.
+    
+    Instances = np.concatenate(Instances + [np.reshape(Partial, (-1, 3))]).astype(np.int64)
+    Number_Cells, Number = Instances.shape[0], Cell_Vertices.shape[0]
+    Number_Full = Number_Cells - len(Partial)
+    
+    Vertices = (Cell_Vertices[None] + (Instances * Period)[:, None]).reshape(-1, 3)
+    Remap = np.arange(Vertices.shape[0])
+    Cell_Index = np.full(tuple(Tiles), -1, dtype=np.int64)
+    Cell_Index[tuple(Instances.T)] = np.arange(Number_Cells)
+    
+    for Axis, (Upper_Plane, Lower_Plane) in enumerate(Plane_Maps):
+        Neighbour = Instances.copy()
+        Neighbour[:, Axis] += 1
+        Within = Neighbour[:, Axis] < Tiles[Axis]
+        Next = np.full(Number_Cells, -1, dtype=np.int64)
+        Next[Within] = Cell_Index[tuple(Neighbour[Within].T)]
+        Linked = np.flatnonzero(Next >= 0)
+        Remap[(Linked[:, None] * Number + Upper_Plane[None]).ravel()] = (Next[Linked][:, None] * Number + Lower_Plane[None]).ravel()
+    
+    for _ in range(3):
+        Remap = Remap[Remap]
+    
+    if Number_Explicit > 0:
+        
+        # The explicit vertices differ from the instance vertices within the tolerance, so they are keyed by the grid
+        # edge holding them. Each one is welded to the instance vertex on that edge in a cell holding the edge, looked
+        # up in the unit cell, or else to the first explicit vertex on the edge.
+        
+        Explicit_Vertices = np.concatenate(Explicit_Vertices)
+        Keys, First, Inverse = np.unique(Edge_Keys(Explicit_Vertices, Volume.shape), return_index=True, return_inverse=True)
+        Point, Edge_Axis = np.array(np.unravel_index(Keys // 4, Volume.shape)).T, Keys % 4
+        
+        Unit_Keys = Edge_Keys(Cell_Vertices, tuple(Period + 1))
+        Order = np.argsort(Unit_Keys)
+        Unit_Keys = Unit_Keys[Order]
+        
+        # Cells holding the edge: the cell of its lower point, and the lower neighbours whose upper faces it lies on.
+        
+        Holders = Point // Period - np.array(list(np.ndindex(2, 2, 2)))[:, None]
+        Local = Point - Holders * Period
+        Valid = np.all((Holders >= 0) & (Holders < Tiles) & ((Local < Period) | ((Local == Period) & (Edge_Axis[:, None] != np.arange(3)))), axis=2)
+        Holder_Instances = np.where(Valid, Cell_Index[tuple(np.clip(Holders, 0, Tiles - 1).transpose(2, 0, 1))], -1)
+        
+        Local_Keys = np.ravel_multi_index(tuple(np.clip(Local, 0, Period).transpose(2, 0, 1)), tuple(Period + 1)) * 4 + Edge_Axis
+        Position = np.clip(np.searchsorted(Unit_Keys, Local_Keys), 0, Unit_Keys.size - 1)
+        Valid &= (Holder_Instances >= 0) & (Unit_Keys[Position] == Local_Keys)
+        
+        Found = Valid.any(axis=0)
+        Holder = np.argmax(Valid, axis=0)[Found]
+        Welded = Vertices.shape[0] + First
+        Welded[Found] = Remap[Holder_Instances[Holder, Found] * Number + Order[Position[Holder, Found]]]
+        
+        Remap = np.concatenate([Remap, Welded[Inverse]])
+        Vertices = np.concatenate([Vertices, Explicit_Vertices])
+        Explicit_Faces = Remap[np.concatenate(Explicit_Faces) + Number_Cells * Number]
+        Explicit_Faces = Explicit_Faces[(Explicit_Faces[:, 0] != Explicit_Faces[:, 1]) & (Explicit_Faces[:, 1] != Explicit_Faces[:, 2]) & (Explicit_Faces[:, 2] != Explicit_Faces[:, 0])]
+    
+    # Vertices used by the faces, found cell by cell, renumbered after removing the others.
+    
+    Used = np.zeros(Vertices.shape[0], dtype=bool)
+    Used[:Number_Full * Number] = np.tile(np.bincount(Cell_Faces.ravel(), minlength=Number) > 0, Number_Full)
+    
+    for Instance, Kept_Faces in enumerate(Partial_Faces, Number_Full):
+        Used[Instance * Number + Cell_Faces[Kept_Faces].ravel()] = True
+    
+    Keep = np.zeros(Vertices.shape[0], dtype=bool)
+    Keep[Remap[Used[:Remap.shape[0]]]] = True
+    
+    if Number_Explicit > 0:
+        Keep[Explicit_Faces.ravel()] = True
+    
+    New_Index = np.cumsum(Keep) - 1
+    Instance_Index = New_Index[Remap[:Number_Cells * Number]].reshape(Number_Cells, Number)
+    
+    Faces = [Instance_Index[:Number_Full][:, Cell_Faces].reshape(-1, 3)]
+    Faces += [Instance_Index[Instance][Cell_Faces[Kept_Faces]] for Instance, Kept_Faces in enumerate(Partial_Faces, Number_Full)]
+    
+    if Number_Explicit > 0:
+        Faces.append(New_Index[Explicit_Faces])
+    
+    Faces = np.concatenate(Faces)
+    
+    if Faces.shape[0] == 0:
+        raise RuntimeError("No surface found at the given iso value.")
+    
+    Vertices = (Vertices[Keep] * Spacing).astype(TPMS.dtype, copy=False)
+
+    return Vertices, Faces, Number_Cells
+
+##################################################
+#            Function: Mesh_Unit_Cell            #
+##################################################
+
+def Mesh_Unit_Cell(Unit, Period):
+    
+    """
+    
+    Mesh the unit cell and make its opposite faces match exactly, so translated copies share their boundary vertices.
+    
+    Parameters:
+    
+        - Unit [numpy.Ndarray]: Scalar field of the unit cell, including its closing planes.
+        - Period [numpy.Ndarray]: Unit cell size X - Y - Z in grid cubes.
+        
+    Returns:
+    
+        - Vertices [numpy.Ndarray]: Array containing the cell vertices in grid index units.
+        - Faces [numpy.Ndarray]: Array containing the cell faces.
+        - Face_Cubes [numpy.Ndarray]: Grid cube of the cell holding every face.
+        - Plane_Maps [List]: Per axis, the vertices on the upper face and their matching vertices on the lower face. None if the faces do not match.
+    
+    """
+    
+    Vertices, Faces = Masked_Marching_Cubes(Unit, np.ones(tuple(Period), dtype=bool), 1.0)
+    
+    # Marching cubes generates coincident duplicates at zero-valued grid points, and vertices off the grid planes by the
+    # rounding of near-zero values. Snap and merge them so the faces pair one to one.
+    
+    Vertices = Vertices.astype(np.float64)
+    Rounded = np.rint(Vertices)
+    Vertices = np.where(np.abs(Vertices - Rounded) < 1e-9, Rounded, Vertices)
+    Vertices, Vertex_Index = Merge_Vertices(Vertices)
+    Faces = Vertex_Index[Faces]
+    Faces = Faces[(Faces[:, 0] != Faces[:, 1]) & (Faces[:, 1] != Faces[:, 2]) & (Faces[:, 2] != Faces[:, 0])]
+    
+    # Every triangle lies inside the cube that generated it.
+    
+    Face_Cubes = np.clip(np.floor(Vertices[Faces].mean(axis=1)).astype(np.int64), 0, Period - 1)
+    Plane_Maps = []
+    
+    for Axis in range(3):
+        
+        Others = [Other for Other in range(3) if Other != Axis]
+        Lower = np.flatnonzero(Vertices[:, Axis] == 0)
+        Upper = np.flatnonzero(Vertices[:, Axis] == Period[Axis])
+        
+        if Lower.size != Upper.size:
+            return Vertices, Faces, Face_Cubes, None
+        
+        if Lower.size == 0:
+            Plane_Maps.append((Upper, Lower))
+            continue
+        
+        Distance, Nearest = cKDTree(Vertices[Lower][:, Others]).query(Vertices[Upper][:, Others], distance_upper_bound=1e-3)
+        
+        if not np.all(np.isfinite(Distance)) or np.unique(Nearest).size != Nearest.size:
+            return Vertices, Faces, Face_Cubes, None
+        
+        # Snap the upper face onto the lower one.
+        
+        Vertices[np.ix_(Upper, Others)] = Vertices[np.ix_(Lower[Nearest], Others)]
+        Plane_Maps.append((Upper, Lower[Nearest]))
+    
+    return Vertices, Faces, Face_Cubes, Plane_Maps
+
+##################################################
+#              Function: Edge_Keys               #
+##################################################
+
+def Edge_Keys(Vertices, Shape):
+    
+    """
+    
+    Key every vertex by the grid edge holding it: the lower point and axis of the edge, or the grid point the vertex lies on.
+    Vertices computed on the same edge from slightly different values share their key.
+    
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices in grid index units.
+        - Shape [Tuple]: Number of grid points along X - Y - Z.
+        
+    Returns:
+    
+        - Keys [numpy.Ndarray]: Integer key of every vertex.
+    
+    """
+    
+    Rounded = np.rint(Vertices)
+    On_Point = np.abs(Vertices - Rounded) < 1e-3
+    Point = np.where(On_Point, Rounded, np.floor(Vertices)).astype(np.int64)
+    Edge_Axis = np.where(On_Point.all(axis=1), 3, np.argmin(On_Point, axis=1))
+    
+    return np.ravel_multi_index(tuple(Point.T), Shape) * 4 + Edge_Axis
+
+##################################################
+#             Function: Tile_Period              #
+##################################################
+
+def Tile_Period(Length, Resolution, NX, NY, NZ, LX, LY, LZ):
+    
+    """
+    
+    Unit cell size in grid cubes of the periodic TPMS defined by Compute_Wave_Functions.
+    
+    Parameters:
+    
+        - Length [Float]: Total length of the cubic grid.
+        - Resolution [Integer]: The number of points along each dimension.
+        - NX, NY, NZ [Float]: Number of periodic repetitions along X - Y - Z axis.
+        - LX, LY, LZ [Float]: Length of the unit cell in X - Y - Z dimension.
+        
+    Returns:
+    
+        - Period [Tuple]: Unit cell size X - Y - Z in grid cubes, or None if a period is not a whole number of cubes.
+    
+    """
+    
+    Cubes = np.divide(np.array([LX, LY, LZ], dtype=np.float64) / np.array([NX, NY, NZ], dtype=np.float64), np.divide(Length, Resolution - 1))
+    Period = np.rint(Cubes)
+    
+    if np.any(Period < 1) or not np.allclose(Cubes, Period, rtol=0, atol=1e-6):
+        return None
+    
+    return tuple(int(Value) for Value in Period)
+
+##################################################
+#              Function: Stream_Mesh             #
+##################################################
+
+PLY_Face_Dtype = np.dtype([('Count', 'u1'), ('Indices', '<i4', (3,))])
+
+def Stream_Mesh(TPMS, Length, Resolution, Path, Block_Size=64, Workers=1):
+    
+    """
+
+    Extract the TPMS mesh block by block and append the triangles of every block to a binary STL or PLY file as they are generated.
+    Memory use is bounded by a few blocks of the field and their triangles, so memory-mapped fields larger than the available memory can be meshed.
+    PLY files keep the shared vertices, welding the plane between consecutive blocks. Their vertices and faces are streamed to two temporary files in the output folder and joined at the end.
+    The file is written to a temporary folder next to Path and only moved to Path once complete, so a failed run leaves no partial output.
+    The mesh is written in grid coordinates, without the element filtering of Convert_STL or the mapping of Map_Mesh, as both need the whole mesh.
+ 
+    Parameters:
+
+    - TPMS [numpy.Ndarray/numpy.Memmap]: A 3D array containing the TPMS calculated points inside the limiting 3D shape to fit a desired relative density.
+    - Length [Float]: Edge distance. Parameter used to define X-Y-Z distance for "Cube" and Z for "Cuboid" and "Cylinder" 
+    - Resolution [Integer]: The number of points along each dimension.
+    - Path [String]: Output file, ".stl" or ".ply".
+    - Block_Size [Integer]: The number of cubes along the first axis meshed per block.
+    - Workers [Integer]: Number of worker processes meshing the blocks. All the available processors are used if None.
+
+    Returns:
+    
+    - Number_Vertices [Integer]: Number of distinct vertices of the mesh.
+    - Number_Faces [Integer]: Number of triangular faces written.
+
+    """
+    
+    Format = os.path.splitext(Path)[1].lower()
+    
+    if Format not in (".stl", ".ply"):
+        raise ValueError("Output file must be a .stl or .ply file.")
+    
+    if Block_Size is None or Block_Size <= 0:
+        raise ValueError("Block size must be a positive integer")
+    
+    Spacing = np.divide(Length, Resolution - 1)
+    Number_Vertices = Number_Faces = 0
+    Previous = None
+    
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(Path))) as Directory:
+        
+        Vertices_Path, Faces_Path = os.path.join(Directory, "Vertices.bin"), os.path.join(Directory, "Faces.bin")
+        Mesh_Path = os.path.join(Directory, "Mesh" + Format)
+        
+        with open(Mesh_Path, 'wb') as Output, open(Vertices_Path, 'wb') as Vertices_File, open(Faces_Path, 'wb') as Faces_File:
+            
+            if Format == ".stl":
+                Output.write(STL_Header(0))
+            
+            for Start, End, Vertices, Faces in Mesh_Blocks(TPMS, Block_Size, Workers):
+                
+                # Global vertex numbering, welding the first plane onto the last plane of the previous block.
+                
+                Global = np.empty(Vertices.shape[0], dtype=np.int64)
+                New = np.ones(Vertices.shape[0], dtype=bool)
+                
+                if Previous is not None and Previous[0] == Start:
+                    First = np.flatnonzero(Vertices[:, 0] == 0)
+                    Keys = Plane_Keys(Vertices[First])
+                    Position = np.clip(np.searchsorted(Previous[1], Keys), 0, max(Previous[1].size - 1, 0))
+                    Match = Previous[1][Position] == Keys if Previous[1].size else np.zeros(First.size, dtype=bool)
+                    Global[First[Match]] = Previous[2][Position[Match]]
+                    New[First[Match]] = False
+                
+                Global[New] = Number_Vertices + np.arange(np.count_nonzero(New))
+                Number_Vertices += int(np.count_nonzero(New))
+                Number_Faces += Faces.shape[0]
+                
+                Last = np.flatnonzero(Vertices[:, 0] == End - Start)
+                Keys = Plane_Keys(Vertices[Last])
+                Order = np.argsort(Keys, kind='stable')
+                Previous = (End, Keys[Order], Global[Last[Order]])
+                
+                Vertices[:, 0] += Start
+                Vertices = Vertices * Spacing
+                
+                # Append the block triangles.
+                
+                if Format == ".stl":
+                    STL_Records(Vertices, Faces).tofile(Output)
+                else:
+                    np.asarray(Vertices[New], dtype='<f4').tofile(Vertices_File)
+                    Records = np.empty(Faces.shape[0], dtype=PLY_Face_Dtype)
+                    Records['Count'] = 3
+                    Records['Indices'] = Global[Faces]
+                    Records.tofile(Faces_File)
+            
+            if Number_Faces == 0:
+                raise RuntimeError("No surface found at the given iso value.")
+            
+            if Format == ".stl":
+                Output.seek(0)
+                Output.write(STL_Header(Number_Faces))
+        
+        # PLY header, followed by the vertices and faces.
+        
+        if Format == ".ply":
+            
+            with open(Mesh_Path, 'wb') as Output:
+                
+                Output.write((
+                    "ply\nformat binary_little_endian 1.0\ncomment TPMS_Generator\n"
+                    f"element vertex {Number_Vertices}\nproperty float x\nproperty float y\nproperty float z\n"
+                    f"element face {Number_Faces}\nproperty list uchar int vertex_indices\nend_header\n"
+                ).encode("ascii"))
+                
+                for Part in (Vertices_Path, Faces_Path):
+                    with open(Part, 'rb') as File:
+                        shutil.copyfileobj(File, Output, 16 * 1024 * 1024)
+        
+        # Replace the output only once the file is complete.
+        
+        os.replace(Mesh_Path, Path)
+        
+    print(f"Mesh streamed with {Number_Vertices} vertices and {Number_Faces} faces to {Path}.")
+    
+    return Number_Vertices, Number_Faces
+
 ##################################################
 #             Function: Convert_STL              #
 ##################################################
@@ -70,26 +1175,150 @@ def Convert_STL(Vertices, Faces, Path):
         
     """
 
-    # Save the mesh model generated in STL format.
+    # Keep the two largest connected elements of the mesh, as the exported model.
+    
+    Element, Number = Mesh_Components(Vertices, Faces)
     
-    Generated_Mesh = mesh.Mesh(np.zeros(Faces.shape[0], dtype=mesh.Mesh.dtype))
-    for i, f in enumerate(Faces):
-        for j in range(3):
-            Generated_Mesh.vectors[i][j] = Vertices[f[j], :]
+    if Number > 2:
+        Areas = np.bincount(Element, weights=Face_Areas(Vertices, Faces), minlength=Number)
+        Faces = Faces[np.isin(Element, np.argsort(Areas, kind='stable')[::-1][:2])]
 
-    Generated_Mesh.save(Path)
-    Generated_Mesh = trimesh.load_mesh(Path, force='mesh')
-    Elements = Generated_Mesh.split(only_watertight=False)
-    Elements = [x for x in Elements if x.area >= 0.0]
+    # Export the obtained STL into the selected path in a single write.
     
-    # Export the obtained STL into the selected path.
+    Records = STL_Records(Vertices, Faces)
     
-    if len(Elements) == 0:
-        Generated_Mesh.export(Path)
-    else:
-        Elements.sort(key=lambda y: y.area, reverse=True)
-        Generated_Mesh = trimesh.util.concatenate(Elements[:2])
-        Generated_Mesh.export(Path)
+    with open(Path, 'wb') as File:
+        File.write(STL_Header(Records.shape[0]))
+        Records.tofile(File)
+
+##################################################
+#             Function: STL_Records              #
+##################################################
+
+STL_Dtype = np.dtype([('Normals', '<f4', (3,)), ('Vectors', '<f4', (3, 3)), ('Attribute', '<u2')])
+
+def STL_Records(Vertices, Faces):
+    
+    """
+    
+    Build the binary STL facet records of a mesh with a single fancy-indexing operation.
+
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+        - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh. Each face is defined by indices that point to the vertices array, specifying the vertices that form each triangle.
+
+    Returns:
+    
+        - Records [numpy.Ndarray]: Structured array with the unit normal and the three corners of every facet.
+        
+    """
+    
+    Records = np.zeros(Faces.shape[0], dtype=STL_Dtype)
+    Records['Vectors'] = np.asarray(Vertices, dtype=np.float32)[Faces]
+    
+    # Unit facet normals following the faces winding.
+    
+    Normals = np.cross(Records['Vectors'][:, 1] - Records['Vectors'][:, 0], Records['Vectors'][:, 2] - Records['Vectors'][:, 0])
+    Norm = np.linalg.norm(Normals, axis=1, keepdims=True)
+    Records['Normals'] = np.divide(Normals, Norm, out=np.zeros_like(Normals), where=Norm > 0)
+    
+    return Records
+
+##################################################
+#              Function: STL_Header              #
+##################################################
+
+def STL_Header(Number):
+    
+    """
+    
+    Build the 84 bytes header of a binary STL file.
+
+    Parameters:
+    
+        - Number [Integer]: Number of facets in the file.
+
+    Returns:
+    
+        - Header [Bytes]: The 80 bytes description followed by the facet count.
+        
+    """
+    
+    Header = b"TPMS_Generator binary STL".ljust(80, b" ") + np.uint32(Number).tobytes()
+    
+    return Header
+
+##################################################
+#            Function: Mesh_Components           #
+##################################################
+
+def Mesh_Components(Vertices, Faces):
+    
+    """
+    
+    Label the connected elements of a mesh. Coincident vertices are merged and faces are connected through shared edges.
+
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+        - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh. Each face is defined by indices that point to the vertices array, specifying the vertices that form each triangle.
+
+    Returns:
+    
+        - Element [numpy.Ndarray]: Connected element label of every face.
+        - Number [Integer]: Number of connected elements.
+        
+    """
+    
+    if Faces.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    
+    # Merge the vertices sharing the same position.
+    
+    _, Vertex_Index = Merge_Vertices(np.asarray(Vertices, dtype=np.float32))
+    Merged_Faces = Vertex_Index[Faces]
+    
+    # Face-edge incidence graph, each edge hashed into one integer key.
+    
+    Edges = np.sort(Merged_Faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    _, Edge_Index = np.unique(Edges[:, 0] * (Vertex_Index.max() + 1) + Edges[:, 1], return_inverse=True)
+    Edge_Index = Edge_Index.ravel()
+    
+    Number_Faces = Faces.shape[0]
+    Graph = coo_matrix((np.ones(Edge_Index.size, dtype=np.int8), (np.repeat(np.arange(Number_Faces), 3), Number_Faces + Edge_Index)), shape=(Number_Faces + Edge_Index.max() + 1,) * 2)
+    
+    Number, Labels = connected_components(Graph, directed=False)
+    _, Element = np.unique(Labels[:Number_Faces], return_inverse=True)
+    
+    return Element.ravel(), int(Element.max()) + 1
+
+##################################################
+#              Function: Face_Areas              #
+##################################################
+
+def Face_Areas(Vertices, Faces):
+    
+    """
+    
+    Compute the area of every triangular face.
+
+    Parameters:
+    
+        - Vertices [numpy.Ndarray]: Array containing 'n' vertices of the mesh. Each vertex is represented by its 3D coordinates.
+        - Faces [numpy.Ndarray]: Array containing 'm' triangular faces of the mesh. Each face is defined by indices that point to the vertices array, specifying the vertices that form each triangle.
+
+    Returns:
+    
+        - Areas [numpy.Ndarray]: Area of every face.
+        
+    """
+    
+    V0 = Vertices[Faces[:, 0]]
+    
+    Areas = 0.5 * np.linalg.norm(np.cross(Vertices[Faces[:, 1]] - V0, Vertices[Faces[:, 2]] - V0), axis=1)
+    
+    return Areas
 
 ##################################################
 #              Function: Map_Mesh                #
@@ -114,27 +1343,18 @@ def Map_Mesh(Vertices, Faces, Bounds):
     
     """
         
-    # Create a trimesh object from raw vertices and faces.
-
-    Mesh = trimesh.Trimesh(vertices=Vertices, faces=Faces, process=False)
+    # Translate the mesh so the minimum coordinate is set to zero, keeping the vertices precision.
 
-    # Translate the mesh so the minimum coordinate is set to zero.
-
-    Min_Coordinates = Mesh.vertices.min(axis=0)
-    Mesh.vertices -= Min_Coordinates
+    Vertices = Vertices - Vertices.min(axis=0)
 
     # Normalize the mesh by dividing each axis by its maximum extent.
 
-    Max_Coordinates = Mesh.vertices.max(axis=0)
-    Mesh.vertices /= Max_Coordinates
+    Vertices /= Vertices.max(axis=0)
 
     # Map mesh to the bounds.
 
-    Mesh.vertices[:, 0] *= Bounds[0]
-    Mesh.vertices[:, 1] *= Bounds[1]
-    Mesh.vertices[:, 2] *= Bounds[2]
+    Vertices *= np.asarray(Bounds, dtype=Vertices.dtype)
 
-    Vertices = Mesh.vertices.copy()
-    Faces = Mesh.faces.copy()
+    Faces = Faces.copy()
 
-    return Vertices, Faces
\ No newline at end of file
+    return Vertices, Faces
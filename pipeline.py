@@ -0,0 +1,407 @@
+import threading
+import numpy as np
+from tpms_generator import EQUATIONS, Generate_Grid_Domain, Compute_Wave_Functions, Parallel_3D_Domain, Symmetric_Field, Solve_Isovalue, Field_Mask
+from mesh_generator import Generate_Solid_Pores, Map_Mesh
+from calibration import Periodic_Cube, Calibrated_Isovalue
+
+##################################################
+#             TPMS Model Pipeline                #
+##################################################
+
+##################################################
+#          Class: Pipeline_Cancelled             #
+##################################################
+
+class Pipeline_Cancelled(Exception):
+
+    """
+
+    Exception raised inside a running pipeline once its cancellation token has been set.
+
+    """
+
+##################################################
+#              Class: Cancel_Token               #
+##################################################
+
+class Cancel_Token:
+
+    """
+
+    Thread-safe cancellation flag shared between the caller and a running pipeline.
+
+    """
+
+    def __init__(self):
+
+        self.Event = threading.Event()
+
+    def Cancel(self):
+
+        # Request the pipeline to stop at the next check.
+
+        self.Event.set()
+
+    def Is_Cancelled(self):
+
+        return self.Event.is_set()
+
+    def Check(self):
+
+        # Abort the pipeline when the cancellation has been requested.
+
+        if self.Event.is_set():
+            raise Pipeline_Cancelled("Model generation cancelled.")
+
+##################################################
+#              Function: Grid_Length             #
+##################################################
+
+def Grid_Length(Length, Radius):
+
+    """
+
+    Compute the length of the cubic grid containing the domain.
+
+    Parameters:
+
+        - Length [Float]: Edge distance of the domain shape.
+        - Radius [Float]: Radius distance of the domain shape.
+
+    Returns:
+
+        - Length_Grid [Float]: Total length of the cubic grid containing the domain.
+
+    """
+
+    if Length / 2 >= Radius:
+        Length_Grid = Length
+    else:
+        Length_Grid = Radius * 2
+
+    return Length_Grid
+
+##################################################
+#            Function: Model_Geometry            #
+##################################################
+
+def Model_Geometry(Domain_Type, Length, Radius):
+
+    """
+
+    Compute the grid length and the final bounds of the model for the selected domain shape.
+
+    Parameters:
+
+        - Domain_Type [String]: The 3D geometric shape selection.
+        - Length [Float]: Edge distance of the domain shape.
+        - Radius [Float]: Radius distance of the domain shape.
+
+    Returns:
+
+        - Length_Grid [Float]: Total length of the cubic grid containing the domain.
+        - Bounds [Tuple]: Spatial extents X - Y - Z of the model.
+
+    """
+
+    Length_Grid = Grid_Length(Length, Radius)
+
+    if Domain_Type == "Cube":
+        Bounds = (Length, Length, Length)
+    elif Domain_Type == "Cuboid":
+        Bounds = (Radius, Radius, Length)
+    elif Domain_Type == "Sphere":
+        Bounds = (2 * Radius, 2 * Radius, 2 * Radius)
+    elif Domain_Type in ["Cylinder", "Ring"]:
+        Bounds = (2 * Radius, 2 * Radius, Length)
+    else:
+        raise ValueError(f"Unknown domain: {Domain_Type}")
+
+    return Length_Grid, Bounds
+
+##################################################
+#            Function: Equation_Source           #
+##################################################
+
+def Equation_Source(Parameters):
+
+    """
+
+    Read the source of the registered equation, so a stage key changes when the equation is replaced under its name.
+
+    Parameters:
+
+        - Parameters [Dictionary]: Model parameters.
+
+    Returns:
+
+        - Source [String]: Compiled source or function hash of the equation, None if it is not registered.
+
+    """
+
+    Kernel = EQUATIONS.get(Parameters.get("Equation"))
+
+    return None if Kernel is None else Kernel.Source
+
+##################################################
+#              Class: Stage_Graph                #
+##################################################
+
+class Stage_Graph:
+
+    """
+
+    Dependency graph of memoised pipeline stages. Every stage is identified by the model parameters it reads and
+    the stages it depends on, and it is only recomputed when one of them changes. The key of a stage nests the keys
+    of its dependencies, so it identifies the stage result across sessions and doubles as the disk cache key.
+
+    """
+
+    def __init__(self):
+
+        self.Stages = {}
+        self.Keys = {}
+        self.Results = {}
+        self.Lock = threading.Lock()
+
+    def Add(self, Name, Function, Inputs=(), Depends=(), Cached=False):
+
+        """
+
+        Register a stage. Function receives the model parameters, a function returning the result of a dependency
+        and the run context, and returns the stage result. Inputs are parameter names, or functions of the parameters
+        for values derived from them. Cached stages return a dictionary of arrays and are also stored in the disk cache.
+
+        """
+
+        self.Stages[Name] = (Function, tuple(Inputs), tuple(Depends), Cached)
+        self.Keys.pop(Name, None)
+        self.Results.pop(Name, None)
+
+    def Key(self, Name, Parameters):
+
+        # Stage inputs, followed by the keys of its dependencies.
+
+        _, Inputs, Depends, _ = self.Stages[Name]
+
+        return (Name, tuple(Input(Parameters) if callable(Input) else Parameters.get(Input) for Input in Inputs), tuple(self.Key(Depend, Parameters) for Depend in Depends))
+
+    def Evaluate(self, Name, Parameters, Context=None):
+
+        """
+
+        Return the result of a stage for the given model parameters, computing it and its outdated dependencies only.
+        Dependencies are evaluated on demand, so stages found in the disk cache do not evaluate their inputs.
+
+        """
+
+        Context = {} if Context is None else Context
+        Function, _, _, Cached = self.Stages[Name]
+        Key = self.Key(Name, Parameters)
+
+        if Name in self.Results and self.Keys[Name] == Key:
+            return self.Results[Name]
+
+        def Get(Depend):
+            return self.Evaluate(Depend, Parameters, Context)
+
+        Cache = Context.get('Cache')
+
+        if Cached and Cache is not None:
+            Result = Cache.Fetch(Cache.Key(Key), lambda: Function(Parameters, Get, Context))
+        else:
+            Result = Function(Parameters, Get, Context)
+
+        self.Keys[Name], self.Results[Name] = Key, Result
+
+        return Result
+
+    def Clear(self):
+
+        # Release every memoised result.
+
+        self.Keys.clear()
+        self.Results.clear()
+
+##################################################
+#              Function: Model_Graph             #
+##################################################
+
+def Model_Graph():
+
+    """
+
+    Build the stage graph of the TPMS pipeline: grid (length and resolution), wave numbers, domain (shape and
+    dimensions), raw field (equation and wave numbers), threshold (topology and density or isovalue), and the solid
+    and pore meshes, extracted together. Further stages, such as the model analysis, can be added to the returned
+    graph.
+
+    Parameters:
+
+        - None.
+
+    Returns:
+
+        - Graph [Stage_Graph]: TPMS pipeline stage graph.
+
+    """
+
+    def Grid(Parameters, Get, Context):
+        Length_Grid = Grid_Length(Parameters["Length"], Parameters["Radius"])
+        Grid = Generate_Grid_Domain(Length_Grid, Parameters["Resolution"], Sparse=True, Dtype=np.dtype(Parameters.get("Dtype", np.float64)))
+        return Grid, Length_Grid
+
+    def Waves(Parameters, Get, Context):
+        return Compute_Wave_Functions(Parameters["NX"], Parameters["NY"], Parameters["NZ"], Parameters["LX"], Parameters["LY"], Parameters["LZ"])
+
+    def Domain(Parameters, Get, Context):
+        Context['Stage']("Domain", 5)
+        (XDomain, YDomain, ZDomain), _ = Get("Grid")
+        return Parallel_3D_Domain(Parameters["Domain"], XDomain, YDomain, ZDomain, Parameters["Length"], Parameters["Radius"], Parameters["InnerRadius"], Workers=Context['Workers'])
+
+    def Field(Parameters, Get, Context):
+        Context['Stage']("TPMS field", 10)
+        (XDomain, YDomain, ZDomain), _ = Get("Grid")
+        KX, KY, KZ = Get("Waves")
+        return Symmetric_Field(Parameters["Equation"], XDomain, YDomain, ZDomain, KX, KY, KZ, Context['Workers'])
+
+    def Threshold(Parameters, Get, Context):
+
+        Domain_Mask, TPMS_Field = Get("Domain"), Get("Field")
+        Context['Stage']("Isovalue", 30)
+
+        if Parameters["Method"] == "Relative Density":
+
+            # The Brent solver starts from the calibration table bracket when the tables describe the model.
+
+            Solver, Bracket = Parameters.get("Solver", "Quantile"), None
+
+            if Solver == "Brent":
+                (XDomain, YDomain, ZDomain), _ = Get("Grid")
+                KX, KY, KZ = Get("Waves")
+                if Periodic_Cube(Parameters["Equation"], Domain_Mask, XDomain, YDomain, ZDomain, KX, KY, KZ):
+                    _, Bracket, _ = Calibrated_Isovalue(Parameters["Equation"], Parameters["Topology"], Parameters["Density"])
+
+            Isovalue = Solve_Isovalue(TPMS_Field, Domain_Mask, Parameters["Topology"], Parameters["Density"], Solver, Callback=Context['Stage'], Bracket=Bracket)
+        elif Parameters["Method"] == "Constant Isovalue":
+            Isovalue = Parameters["Density"]
+        else:
+            raise ValueError(f"Unknown method: {Parameters['Method']}")
+
+        TPMS = Field_Mask(TPMS_Field, Domain_Mask, Parameters["Topology"], Isovalue)
+
+        return {'TPMS': TPMS, 'Domain': Domain_Mask, 'Isovalue': np.asarray(Isovalue)}
+
+    def Meshes(Parameters, Get, Context):
+
+        # Solid and pore meshes from a single marching cubes pass, each mapped to the model bounds.
+
+        Context['Stage']("Solid and pore meshes", 40)
+        _, Length_Grid = Get("Grid")
+        _, Bounds = Model_Geometry(Parameters["Domain"], Parameters["Length"], Parameters["Radius"])
+        Vertices, Faces, Vertices_Pores, Faces_Pores = Generate_Solid_Pores(Get("Threshold")['TPMS'], Length_Grid, Parameters["Resolution"], Process=Parameters.get("Process", False))
+        Vertices, Faces = Map_Mesh(Vertices, Faces, Bounds)
+        Vertices_Pores, Faces_Pores = Map_Mesh(Vertices_Pores, Faces_Pores, Bounds)
+
+        return {'TPMS_Vertices': Vertices, 'TPMS_Faces': Faces, 'Pores_Vertices': Vertices_Pores, 'Pores_Faces': Faces_Pores}
+
+    Graph = Stage_Graph()
+    Graph.Add("Grid", Grid, Inputs=["Length", "Radius", "Resolution", "Dtype"])
+    Graph.Add("Waves", Waves, Inputs=["NX", "NY", "NZ", "LX", "LY", "LZ"])
+    Graph.Add("Domain", Domain, Inputs=["Domain", "Length", "Radius", "InnerRadius"], Depends=["Grid"])
+    Graph.Add("Field", Field, Inputs=["Equation", Equation_Source], Depends=["Grid", "Waves"])
+    Graph.Add("Threshold", Threshold, Inputs=["Equation", "Topology", "Method", "Density", "Solver"], Depends=["Grid", "Waves", "Field", "Domain"], Cached=True)
+    Graph.Add("Meshes", Meshes, Inputs=["Domain", "Length", "Radius", "Process"], Depends=["Grid", "Threshold"], Cached=True)
+
+    return Graph
+
+##################################################
+#              Function: Run_Context             #
+##################################################
+
+def Run_Context(Progress=None, Cancel=None, Workers=None, Cache=None):
+
+    """
+
+    Bundle the run options handed to every evaluated stage of a graph.
+
+    Parameters:
+
+        - Progress [Callable]: Optional function receiving the stage name and the completed percentage.
+        - Cancel [Cancel_Token]: Optional cancellation token.
+        - Workers [Integer]: Number of threads evaluating the field. All the available processors are used if None.
+        - Cache [Model_Cache]: Optional on-disk cache of the cached stages.
+
+    Returns:
+
+        - Context [Dictionary]: Stage function, checking the cancellation and reporting the progress when called
+          with a name, number of workers and cache.
+
+    """
+
+    Cancel = Cancel_Token() if Cancel is None else Cancel
+
+    def Stage(Name=None, Percent=None):
+        Cancel.Check()
+        if Progress is not None and Name is not None:
+            Progress(Name, Percent)
+
+    Context = {'Stage': Stage, 'Workers': Workers, 'Cache': Cache}
+
+    return Context
+
+##################################################
+#            Function: Generate_Model            #
+##################################################
+
+def Generate_Model(Parameters, Progress=None, Cancel=None, Workers=None, Cache=None, Graph=None):
+
+    """
+
+    Run the TPMS generation pipeline: grid, domain, density or isovalue solution, and solid and pore meshes.
+    The cancellation token is checked between stages and inside the isovalue solver.
+
+    Parameters:
+
+        - Parameters [Dictionary]: Model parameters with keys "Equation", "Domain", "Topology", "Method", "Density",
+          "Length", "Radius", "InnerRadius", "Resolution", "NX", "NY", "NZ", "LX", "LY", "LZ" and optionally "Dtype",
+          "Solver", the density solver of Solve_Isovalue, and "Process", post-processing the meshes. The "Brent" solver
+          is bracketed by the calibration tables for a cube with a whole number of unit cells.
+        - Progress [Callable]: Optional function receiving the stage name and the completed percentage.
+        - Cancel [Cancel_Token]: Optional cancellation token.
+        - Workers [Integer]: Number of threads evaluating the field. All the available processors are used if None.
+        - Cache [Model_Cache]: Optional on-disk cache reusing the fields and meshes of previously generated models.
+        - Graph [Stage_Graph]: Optional stage graph kept between calls, so only the stages whose parameters changed
+          are recomputed. A new graph is used if None.
+
+    Returns:
+
+        - Model [Dictionary]: TPMS field, domain mask, solved isovalue, solid and pore meshes, voxel size and bounds.
+
+    """
+
+    Graph = Model_Graph() if Graph is None else Graph
+    Context = Run_Context(Progress, Cancel, Workers, Cache)
+    Stage = Context['Stage']
+
+    Length_Grid, Bounds = Model_Geometry(Parameters["Domain"], Parameters["Length"], Parameters["Radius"])
+
+    # Only the outdated stages are evaluated, the graph lock serialises concurrent runs on the same graph.
+
+    with Graph.Lock:
+
+        Threshold = Graph.Evaluate("Threshold", Parameters, Context)
+        Meshes = Graph.Evaluate("Meshes", Parameters, Context)
+
+    Stage("Meshes generated", 80)
+
+    Model = {
+        'TPMS': Threshold['TPMS'],
+        'Domain': Threshold['Domain'],
+        'Isovalue': float(Threshold['Isovalue']),
+        **Meshes,
+        'Voxel_Size': np.divide(Length_Grid, Parameters["Resolution"] - 1),
+        'Bounds': Bounds
+    }
+
+    return Model
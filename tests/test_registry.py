@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import Model_Graph
+from tpms_generator import EQUATIONS, Register_Equation
+
+PARAMETERS = {
+    "Equation": "Closure", "Length": 1.0, "Radius": 0.5, "Resolution": 12,
+    "NX": 1, "NY": 1, "NZ": 1, "LX": 1.0, "LY": 1.0, "LZ": 1.0
+}
+
+def Closure_Equation(Offset):
+    def Equation(x, y, z, kx, ky, kz):
+        return np.cos(kx*x) + np.cos(ky*y) + np.cos(kz*z) + Offset
+    return Equation
+
+def test_replaced_closure_recomputes_field():
+
+    # Two closures of the same factory share their bytecode, only the captured offset differs.
+
+    Graph = Model_Graph()
+    Context = {'Stage': lambda Name=None, Percent=None: None, 'Workers': 1}
+
+    try:
+        Register_Equation("Closure", Closure_Equation(0.0))
+        First_Key = Graph.Key("Field", PARAMETERS)
+        First = np.array(Graph.Evaluate("Field", PARAMETERS, Context))
+
+        Register_Equation("Closure", Closure_Equation(1.0), Replace=True)
+        Second_Key = Graph.Key("Field", PARAMETERS)
+        Second = np.array(Graph.Evaluate("Field", PARAMETERS, Context))
+    finally:
+        EQUATIONS.pop("Closure", None)
+
+    assert First_Key != Second_Key
+    np.testing.assert_allclose(Second - First, 1.0)
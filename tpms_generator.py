@@ -1,3 +1,8 @@
+import ast
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from scipy.optimize import brentq
 
@@ -9,7 +14,7 @@ from scipy.optimize import brentq
 #        Function: Generate_Grid_Domain          #
 ##################################################
 
-def Generate_Grid_Domain(Length, Resolution):
+def Generate_Grid_Domain(Length, Resolution, Sparse=False, Dtype=np.float64):
     
     """
 
@@ -19,6 +24,8 @@ def Generate_Grid_Domain(Length, Resolution):
     
         - Length [Float]: The total length of the grid in each dimension.
         - Resolution [Integer]: The number of points along each dimension.
+        - Sparse [Boolean]: Return open grid views of shape (N, 1, 1), (1, N, 1) and (1, 1, N) backed by the 1D axis instead of three dense N^3 arrays.
+        - Dtype [numpy.Dtype]: Floating point precision of the grid, carried by every array computed from it. "float32" halves memory and bandwidth.
 
     Returns:
 
@@ -40,8 +47,8 @@ def Generate_Grid_Domain(Length, Resolution):
     # 3D cube grid domain creation.
     
     Half_Length = np.divide(Length, 2.0)
-    Axis = np.linspace(-Half_Length, Half_Length, Resolution)
-    XDomain, YDomain, ZDomain = np.meshgrid(Axis, Axis, Axis, indexing='ij')
+    Axis = np.linspace(-Half_Length, Half_Length, Resolution, dtype=Dtype)
+    XDomain, YDomain, ZDomain = np.meshgrid(Axis, Axis, Axis, indexing='ij', sparse=Sparse)
     
     return XDomain, YDomain, ZDomain
             
@@ -198,6 +205,373 @@ def Compute_Wave_Functions(NX, NY, NZ, LX, LY, LZ):
     
     return KX, KY, KZ
 
+##################################################
+#              Function: Grid_Axes               #
+##################################################
+
+def Grid_Axes(XDomain, YDomain, ZDomain):
+    
+    """
+
+    Reduce the grid coordinates to broadcastable per-axis views, since the TPMS terms only depend on one axis each.
+    Grids that are not axis aligned are returned unchanged.
+
+    Parameters:
+        
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        
+    Returns:
+
+        - XAxis, YAxis, ZAxis [numpy.Ndarray]: Arrays of shape (N, 1, 1), (1, N, 1) and (1, 1, N) with the axis coordinates. 
+    
+    """ 
+    
+    # Axis views of an 'ij' indexed grid. 
+    
+    XAxis = XDomain[:, :1, :1]
+    YAxis = YDomain[:1, :, :1]
+    ZAxis = ZDomain[:1, :1, :]
+
+    # Check the whole grid is constant along the remaining directions. Sparse grids already have the axis shapes.
+    
+    for Domain, Axis in ((XDomain, XAxis), (YDomain, YAxis), (ZDomain, ZAxis)):
+        if not np.array_equal(np.broadcast_to(Axis, Domain.shape), Domain):
+            return XDomain, YDomain, ZDomain
+    
+    return XAxis, YAxis, ZAxis
+
+##################################################
+#            TPMS Equation Registry              #
+##################################################
+
+# Functions and operations allowed in the equation expressions, in the variables x, y, z and the wave numbers kx, ky, kz.
+
+EXPRESSION_FUNCTIONS = {'sin': "np.sin", 'cos': "np.cos", 'tan': "np.tan", 'exp': "np.exp", 'log': "np.log", 'sqrt': "np.sqrt", 'abs': "np.abs"}
+
+EXPRESSION_OPERATORS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}
+
+##################################################
+#           Function: Compile_Equation           #
+##################################################
+
+def Compile_Equation(Expression, Name="Equation"):
+    
+    """
+
+    Compile an implicit equation expression, such as "sin(kx*x)*cos(ky*y) + sin(ky*y)*cos(kz*z) + sin(kz*z)*cos(kx*x)", into a NumPy kernel.
+    Repeated subexpressions are evaluated once, and every subexpression is evaluated on the axis views of the variables it depends on, so the sine and cosine terms are per-axis tables.
+    Products are multiplied from the factors with the fewest variables, so only their last product is a full 3D operation, written into the output buffer.
+    The terms depending on less than three variables are summed together while they stay two dimensional and then added in place.
+
+    Parameters:
+        
+        - Expression [String]: Equation in the coordinates x, y, z, the wave numbers kx, ky, kz, the constant pi and the functions of EXPRESSION_FUNCTIONS.
+        - Name [String]: Equation name, used in the error messages and in the kernel tracebacks.
+        
+    Returns:
+
+        - Kernel [Callable]: Function receiving (x, y, z, kx, ky, kz, Out) and filling the preallocated Out array in place.
+    
+    """ 
+    
+    try:
+        Tree = ast.parse(Expression, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression for {Name}: {e.msg}") from None
+    
+    Lines = []
+    Temporaries = {}
+    
+    def Temporary(Code):
+        
+        # Common subexpression elimination over the generated code.
+        
+        if Code not in Temporaries:
+            Temporaries[Code] = f"T{len(Temporaries)}"
+            Lines.append(f"{Temporaries[Code]} = {Code}")
+        
+        return Temporaries[Code]
+    
+    def Emit(Node):
+        
+        # Code and variables of a subexpression.
+        
+        if isinstance(Node, ast.Constant) and isinstance(Node.value, (int, float)) and not isinstance(Node.value, bool):
+            return repr(Node.value), frozenset()
+        elif isinstance(Node, ast.Name) and Node.id in ("x", "y", "z"):
+            return Node.id, frozenset(Node.id)
+        elif isinstance(Node, ast.Name) and Node.id in ("kx", "ky", "kz", "pi"):
+            return Node.id, frozenset()
+        elif isinstance(Node, ast.UnaryOp) and isinstance(Node.op, (ast.USub, ast.UAdd)):
+            Code, Variables = Emit(Node.operand)
+            return (Temporary(f"-{Code}") if isinstance(Node.op, ast.USub) else Code), Variables
+        elif isinstance(Node, ast.BinOp) and type(Node.op) in EXPRESSION_OPERATORS:
+            Left, Left_Variables = Emit(Node.left)
+            Right, Right_Variables = Emit(Node.right)
+            return Temporary(f"{Left} {EXPRESSION_OPERATORS[type(Node.op)]} {Right}"), Left_Variables | Right_Variables
+        elif isinstance(Node, ast.Call) and isinstance(Node.func, ast.Name) and Node.func.id in EXPRESSION_FUNCTIONS and len(Node.args) == 1 and not Node.keywords:
+            Code, Variables = Emit(Node.args[0])
+            return Temporary(f"{EXPRESSION_FUNCTIONS[Node.func.id]}({Code})"), Variables
+        
+        raise ValueError(f"Unsupported element in the expression of {Name}: {ast.unparse(Node)}")
+    
+    def Terms(Node, Sign):
+        
+        # Signed terms of the top level sum.
+        
+        if isinstance(Node, ast.BinOp) and isinstance(Node.op, (ast.Add, ast.Sub)):
+            return Terms(Node.left, Sign) + Terms(Node.right, Sign if isinstance(Node.op, ast.Add) else - Sign)
+        elif isinstance(Node, ast.UnaryOp) and isinstance(Node.op, (ast.USub, ast.UAdd)):
+            return Terms(Node.operand, - Sign if isinstance(Node.op, ast.USub) else Sign)
+        
+        # Constant factors are distributed over the sums they scale, so the sums are accumulated in place too.
+        
+        if isinstance(Node, ast.BinOp) and isinstance(Node.op, (ast.Mult, ast.Div)):
+            for Sum, Scale in ((Node.left, Node.right), (Node.right, Node.left)):
+                if Scale is Node.left and isinstance(Node.op, ast.Div):
+                    continue
+                if len(Terms(Sum, 1)) > 1 and not Emit(Scale)[1]:
+                    return [(Term_Sign, ast.BinOp(Term, Node.op, Scale) if Scale is Node.right else ast.BinOp(Scale, Node.op, Term)) for Term_Sign, Term in Terms(Sum, Sign)]
+        
+        return [(Sign, Node)]
+    
+    def Factors(Node):
+        
+        # Factors of a product.
+        
+        if isinstance(Node, ast.BinOp) and isinstance(Node.op, ast.Mult):
+            return Factors(Node.left) + Factors(Node.right)
+        
+        return [Node]
+    
+    Full_Terms, Low_Terms = [], []
+    
+    for Sign, Node in Terms(Tree, 1):
+        
+        # Product factors sorted by their number of variables, multiplied while the result stays below three dimensions.
+        
+        Emitted = sorted((Emit(Factor) for Factor in Factors(Node)), key=lambda Factor: len(Factor[1]))
+        Code, Variables = Emitted[0]
+        Remaining = []
+        
+        for Factor_Code, Factor_Variables in Emitted[1:]:
+            if len(Variables | Factor_Variables) < 3 and not Remaining:
+                Code, Variables = Temporary(f"{Code} * {Factor_Code}"), Variables | Factor_Variables
+            else:
+                Remaining.append(Factor_Code)
+        
+        if len(Variables) < 3 and not Remaining:
+            Low_Terms.append((Sign, Code, Variables))
+        else:
+            Full_Terms.append((Sign, Code, Remaining))
+    
+    # Full 3D terms, the first one written into the output and the following ones accumulated through a scratch buffer.
+    
+    if len(Full_Terms) > 1:
+        Lines.append("Scratch = np.empty_like(Out)")
+    
+    for Index, (Sign, Code, Remaining) in enumerate(Full_Terms):
+        
+        Target = "Out" if Index == 0 else "Scratch"
+        
+        if Index == 0 and Sign < 0:
+            Code = Temporary(f"-{Code}")
+        
+        if Remaining:
+            Lines.append(f"np.multiply({Code}, {Remaining[0]}, out={Target})")
+            Lines.extend(f"{Target} *= {Factor_Code}" for Factor_Code in Remaining[1:])
+        else:
+            Lines.append(f"np.copyto({Target}, {Code})")
+        
+        if Index > 0:
+            Lines.append(f"Out {'+' if Sign > 0 else '-'}= Scratch")
+    
+    # Lower dimensional terms grouped while their variables stay below three.
+    
+    Groups = []
+    
+    for Sign, Code, Variables in sorted(Low_Terms, key=lambda Term: len(Term[2])):
+        for Group in Groups:
+            if len(Group[0] | Variables) < 3:
+                Group[0] |= Variables
+                Group[1].append((Sign, Code))
+                break
+        else:
+            Groups.append([set(Variables), [(Sign, Code)]])
+    
+    Group_Codes = []
+    
+    for _, Group_Terms in Groups:
+        if len(Group_Terms) == 1:
+            Group_Codes.append(Group_Terms[0])
+        else:
+            Sum = " ".join(f"{'+' if Sign > 0 else '-'} {Code}" for Sign, Code in Group_Terms).lstrip("+ ")
+            Group_Codes.append((1, Temporary(Sum)))
+    
+    # Without full terms the first two groups are added straight into the output.
+    
+    if not Full_Terms:
+        (Sign, Code), Group_Codes = Group_Codes[0], Group_Codes[1:]
+        Code = Code if Sign > 0 else Temporary(f"-{Code}")
+        if Group_Codes:
+            (Sign, Second), Group_Codes = Group_Codes[0], Group_Codes[1:]
+            Lines.append(f"np.{'add' if Sign > 0 else 'subtract'}({Code}, {Second}, out=Out)")
+        else:
+            Lines.append(f"Out[...] = {Code}")
+    
+    Lines.extend(f"Out {'+' if Sign > 0 else '-'}= {Code}" for Sign, Code in Group_Codes)
+    
+    Source = "def Kernel(x, y, z, kx, ky, kz, Out):\n" + "".join(f"    {Line}\n" for Line in Lines)
+    Namespace = {'np': np, 'pi': np.pi}
+    exec(compile(Source, f"<equation {Name}>", "exec"), Namespace)
+    
+    Kernel = Namespace['Kernel']
+    Kernel.Source = Source
+    
+    return Kernel
+
+##################################################
+#          Function: Register_Equation           #
+##################################################
+
+def Register_Equation(Name, Expression, Replace=False):
+    
+    """
+
+    Add an implicit equation to the registry used by Equation_Field and every field function.
+    Only the built-in equations have mirror symmetries for Symmetric_Field.
+
+    Parameters:
+        
+        - Name [String]: The TPMS equation selection it is registered under, such as "Lidinoid".
+        - Expression [String/Callable]: Expression compiled by Compile_Equation, or a function receiving (x, y, z, kx, ky, kz) and returning the field values.
+        - Replace [Boolean]: Allow replacing an already registered equation. The built-in equations cannot be replaced, as their symmetries and calibration tables are stored by name.
+        
+    Returns:
+
+        - Nothing.
+    
+    """ 
+    
+    if Name in EQUATIONS and Name in EQUATION_EXPRESSIONS:
+        raise ValueError(f"Built-in equation cannot be replaced: {Name}")
+    if Name in EQUATIONS and not Replace:
+        raise ValueError(f"Equation already registered: {Name}")
+    
+    if isinstance(Expression, str):
+        Kernel = Compile_Equation(Expression, Name)
+    elif callable(Expression):
+        def Kernel(x, y, z, kx, ky, kz, Out):
+            Out[...] = Expression(x, y, z, kx, ky, kz)
+        
+        # A function may read closure cells, defaults or globals besides its code, so every registration gets its own
+        # identifier. The cached fields of a function are only reused within the session that registered it.
+        
+        Kernel.Source = f"{Name}:{uuid.uuid4().hex}"
+    else:
+        raise ValueError("Expression must be a string or a callable")
+    
+    EQUATIONS[Name] = Kernel
+
+# Built-in equations. The IWP and Neovius products are expanded, so their sums are accumulated in place.
+# The Diamond Y cosine keeps the X wave number of the original implementation.
+
+EQUATIONS = {}
+
+EQUATION_EXPRESSIONS = {
+    'Primitive': "cos(kx*x) + cos(ky*y) + cos(kz*z)",
+    'Gyroid': "sin(kx*x)*cos(ky*y) + sin(ky*y)*cos(kz*z) + sin(kz*z)*cos(kx*x)",
+    'IWP': "2*cos(kx*x)*cos(ky*y) + 2*cos(ky*y)*cos(kz*z) + 2*cos(kz*z)*cos(kx*x) - cos(2*kx*x) - cos(2*ky*y) - cos(2*kz*z)",
+    'Diamond': "cos(kx*x)*cos(kx*y)*cos(kz*z) - sin(kx*x)*sin(ky*y)*sin(kz*z)",
+    'Neovius': "3*cos(kx*x) + 3*cos(ky*y) + 3*cos(kz*z) + 4*cos(kx*x)*cos(ky*y)*cos(kz*z)",
+    'FK-S': "cos(2*kx*x)*sin(ky*y)*cos(kz*z) + cos(kx*x)*cos(2*ky*y)*sin(kz*z) + sin(kx*x)*cos(ky*y)*cos(2*kz*z)"
+}
+
+for Name, Expression in EQUATION_EXPRESSIONS.items():
+    Register_Equation(Name, Expression)
+
+##################################################
+#            Function: Equation_Field            #
+##################################################
+
+def Equation_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Out=None):
+    
+    """
+
+    Function to evaluate the raw TPMS equation over the grid, before any isovalue or topology is applied.
+    The compiled kernel of the registered equation evaluates the sine and cosine terms once per axis and combines them through broadcasting outer products.
+
+    Parameters:
+        
+        - Equation [String]: The TPMS equation selection, any name registered in EQUATIONS.
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        - KX [Float]: Scalar value representing the wave value in X dimension.
+        - KY [Float]: Scalar value representing the wave value in Y dimension.
+        - KZ [Float]: Scalar value representing the wave value in Z dimension.
+        - Out [numpy.Ndarray]: Optional preallocated array with the grid shape and precision, filled in place.
+        
+    Returns:
+
+        - TPMS_Field [numpy.Ndarray]: 3D array containing the raw TPMS equation values. 
+    
+    """ 
+    
+    if Equation not in EQUATIONS:
+        raise ValueError(f"Unknown equation: {Equation}")
+    
+    XAxis, YAxis, ZAxis = Grid_Axes(XDomain, YDomain, ZDomain)
+    Dtype = np.result_type(XDomain, YDomain, ZDomain)
+    TPMS_Field = np.empty(np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape), dtype=Dtype) if Out is None else Out
+    
+    # Wave numbers in the grid precision, so the field keeps it.
+    
+    KX, KY, KZ = Dtype.type(KX), Dtype.type(KY), Dtype.type(KZ)
+    
+    EQUATIONS[Equation](XAxis, YAxis, ZAxis, KX, KY, KZ, TPMS_Field)
+          
+    return TPMS_Field
+
+##################################################
+#            Function: Topology_Field            #
+##################################################
+
+def Topology_Field(TPMS_Field, Topology, Isovalue):
+    
+    """
+
+    Function to apply the topology condition and the isovalue to an already evaluated TPMS field.
+    The raw field is not modified, so it can be reused for different isovalues.
+
+    Parameters:
+        
+        - TPMS_Field [numpy.Ndarray]: Array containing the raw TPMS equation values.
+        - Topology [String]: Equation condition. 
+        - Isovalue [Float/numpy.Ndarray]: Constant isovalue, or a per-voxel isovalue field broadcastable to the grid for graded structures.
+        
+    Returns:
+
+        - TPMS_Equation [numpy.Ndarray]: Array containing the TPMS calculated points. 
+    
+    """ 
+    
+    TPMS_Equation = TPMS_Field
+    Isovalue = np.asarray(Isovalue, dtype=TPMS_Field.dtype)
+    
+    # Equation topology modification regarding the isovalue.
+    
+    if Topology == 'Solid 1':
+        TPMS_Equation = TPMS_Field - Isovalue
+    elif Topology == 'Solid 2':
+        TPMS_Equation = TPMS_Field + Isovalue    
+    elif Topology == 'Sheet':
+        TPMS_Equation = (TPMS_Field - Isovalue) * (TPMS_Field + Isovalue)
+          
+    return TPMS_Equation
+
 ##################################################
 #          Function: Equation_Selection          #
 ##################################################
@@ -226,31 +600,13 @@ def Equation_Selection(Equation, Topology, XDomain, YDomain, ZDomain, KX, KY, KZ
     
     """ 
     
-    TPMS_Equation = np.zeros_like(XDomain)
-    
     # Equation selected calculation.
     
-    if Equation == 'Primitive':
-        TPMS_Equation = np.cos(KX * XDomain) + np.cos(KY * YDomain) + np.cos(KZ * ZDomain)
-    elif Equation == 'Gyroid':
-        TPMS_Equation = np.sin(KX * XDomain) * np.cos(KY * YDomain) + np.sin(KY * YDomain) * np.cos(KZ * ZDomain) + np.sin(KZ * ZDomain) * np.cos(KX * XDomain)
-    elif Equation == 'IWP':
-        TPMS_Equation = 2 * ((np.cos(KX * XDomain) * np.cos(KY * YDomain) + np.cos(KY * YDomain) * np.cos(KZ * ZDomain) + np.cos(KZ * ZDomain) * np.cos(KX * XDomain))) - (np.cos(2 * KX * XDomain) + np.cos(2 * KY * YDomain) + np.cos(2 * KZ * ZDomain))
-    elif Equation == 'Diamond':
-        TPMS_Equation = np.cos(KX * XDomain) * np.cos(KX * YDomain) * np.cos(KZ * ZDomain) - np.sin(KX * XDomain) * np.sin(KY * YDomain) * np.sin(KZ * ZDomain)
-    elif Equation == 'Neovius':
-        TPMS_Equation = 3 * (np.cos(KX * XDomain) + np.cos(KY * YDomain) + np.cos(KZ * ZDomain)) + 4 * (np.cos(KX * XDomain) * np.cos(KY * YDomain) * np.cos(KZ * ZDomain))
-    elif Equation == 'FK-S':
-        TPMS_Equation = np.cos(2 * KX * XDomain) * np.sin(KY * YDomain) * np.cos(KZ * ZDomain) + np.cos(KX * XDomain) * np.cos(2 * KY * YDomain) * np.sin(KZ * ZDomain) + np.sin(KX * XDomain) * np.cos(KY * YDomain) * np.cos(2 * KZ *ZDomain)
+    TPMS_Field = Equation_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ)
   
     # Equation topology modification regarding the isovalue.
     
-    if Topology == 'Solid 1':
-        TPMS_Equation = TPMS_Equation - Isovalue
-    elif Topology == 'Solid 2':
-        TPMS_Equation = TPMS_Equation + Isovalue    
-    elif Topology == 'Sheet':
-        TPMS_Equation = (TPMS_Equation - Isovalue) * (TPMS_Equation + Isovalue)
+    TPMS_Equation = Topology_Field(TPMS_Field, Topology, Isovalue)
           
     return TPMS_Equation
 
@@ -258,7 +614,7 @@ def Equation_Selection(Equation, Topology, XDomain, YDomain, ZDomain, KX, KY, KZ
 #             Function: Isovalue_Mask            #
 ##################################################
 
-def Isovalue_Mask(Equation, Domain, Topology, Isovalue, XDomain, YDomain, ZDomain, KX, KY, KZ):
+def Isovalue_Mask(Equation, Domain, Topology, Isovalue, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers=1):
 
     """
 
@@ -269,13 +625,14 @@ def Isovalue_Mask(Equation, Domain, Topology, Isovalue, XDomain, YDomain, ZDomai
         - Equation [String]: The TPMS equation selection.
         - Domain [String]: The 3D geometrical shape selection.
         - Topology [String]: Equation condition. 
-        - Isovalue [Float]: Constant isovalue.
+        - Isovalue [Float/numpy.Ndarray]: Constant isovalue, or a per-voxel isovalue field broadcastable to the grid for graded structures.
         - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
         - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
         - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
         - KX [Float]: Scalar value representing the wave value in X dimension.
         - KY [Float]: Scalar value representing the wave value in Y dimension.
         - KZ [Float]: Scalar value representing the wave value in Z dimension.
+        - Workers [Integer]: Number of threads evaluating the field. All the available processors are used if None.
 
     Returns:
 
@@ -283,13 +640,42 @@ def Isovalue_Mask(Equation, Domain, Topology, Isovalue, XDomain, YDomain, ZDomai
     
     """
     
-    # Compute the TPMS equation according to the parameters selected.
+    # Compute the raw TPMS equation according to the parameters selected.
     
-    TPMS = Equation_Selection(Equation, Topology, XDomain, YDomain, ZDomain, KX, KY, KZ, Isovalue)
+    TPMS_Field = Parallel_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers)
 
     # Compute the TPMS selection to the 3D selected domain.
     
-    TPMS = - TPMS * Domain
+    TPMS = Field_Mask(TPMS_Field, Domain, Topology, Isovalue)
+    
+    return TPMS
+
+##################################################
+#              Function: Field_Mask              #
+##################################################
+
+def Field_Mask(TPMS_Field, Domain, Topology, Isovalue):
+
+    """
+
+    Adjust an already evaluated TPMS field to an specific Isovalue in the desired domain shape.
+
+    Parameters:
+
+        - TPMS_Field [numpy.Ndarray]: 3D array containing the raw TPMS equation values.
+        - Domain [numpy.Ndarray]: 3D boolean mask of the limiting domain shape.
+        - Topology [String]: Equation condition. 
+        - Isovalue [Float/numpy.Ndarray]: Constant isovalue, or a per-voxel isovalue field broadcastable to the grid for graded structures.
+
+    Returns:
+
+        - TPMS [numpy.Ndarray]: 3D array containing the TPMS calculated points inside the limiting 3D domain shape.
+    
+    """
+    
+    # Apply the topology condition and limit the TPMS to the 3D selected domain.
+    
+    TPMS = - Topology_Field(TPMS_Field, Topology, Isovalue) * Domain
     
     return TPMS
 
@@ -336,47 +722,1146 @@ def Density_Value(Isovalue, Equation, Domain, Topology, Density, XDomain, YDomai
     return Resulted_Density
 
 ##################################################
-#          Function: Relative_Density            #
+#         Function: Field_Density_Value          #
 ##################################################
 
-def Relative_Density(Equation, Domain, Topology, Density, XDomain, YDomain, ZDomain, KX, KY, KZ):
-    
+def Field_Density_Value(Isovalue, Domain_Field, Topology, Density):
+   
     """
     
-    Find optimal isovalue using Brent method and return final TPMS mask.
+    Compute the difference between the TPMS density at a given isovalue and the target density from a cached field.
+    Only the raw equation values inside the domain are needed, so no trigonometric function is evaluated again.
     
     Parameters:
-    
-        - Equation [String]: The TPMS equation selection.
-        - Domain [String]: The 3D geometrical shape selection.
+        
+        - Isovalue [Float]: Constant isovalue.
+        - Domain_Field [numpy.Ndarray]: 1D array with the raw TPMS equation values of the points inside the domain.
         - Topology [String]: Equation condition. 
         - Density [Float]: Desired model relative density.
-        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
-        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
-        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
-        - KX [Float]: Scalar value representing the wave value in X dimension.
-        - KY [Float]: Scalar value representing the wave value in Y dimension.
-        - KZ [Float]: Scalar value representing the wave value in Z dimension.
-
+    
     Returns:
+    
+        - Resulted_Density [Float]: Difference between computed and desired density used for Brent optimisation.
+    
+    """
+    
+    # Relative density difference between the TPMS model and the selected domain.
+    
+    Volume_Domain = Domain_Field.size
+    Volume_TPMS = np.count_nonzero(Topology_Field(Domain_Field, Topology, Isovalue) > 0)
+
+    Current_Density = 1 - np.divide(Volume_TPMS, Volume_Domain)
+    Resulted_Density = Current_Density - Density
+
+    return Resulted_Density
+
+##################################################
+#          Function: Quantile_Isovalue           #
+##################################################
+
+def Quantile_Isovalue(Domain_Field, Topology, Density):
+   
+    """
+    
+    Compute the exact isovalue that matches the target density from the distribution of the in-domain field values.
+    The voxel density is a step function of the isovalue, so the solution is read off the sorted values instead of being searched.
+    
+    Parameters:
         
-        - Final_TPMS [numpy.Ndarray]: 3D binary mask representing the final TPMS structure that matches the requested density.    
+        - Domain_Field [numpy.Ndarray]: 1D array with the raw TPMS equation values of the points inside the domain.
+        - Topology [String]: Equation condition. 
+        - Density [Float/numpy.Ndarray]: Desired model relative density, or a vector of them for a density sweep.
+    
+    Returns:
+    
+        - Isovalue [Float/numpy.Ndarray]: Isovalue placing the requested fraction of in-domain points in the solid part.
     
     """
+    
+    # Values compared against the isovalue and number of solid points for each target density.
+    
+    Values = Threshold_Values(Domain_Field.ravel(), Topology)
+    Count, Lower_Index, Upper_Index = Solid_Counts(Density, Values.size)
+
+    # Partial selection of the order statistics around every requested count.
+    
+    Values = np.partition(Values, np.unique(np.concatenate((Lower_Index.ravel(), Upper_Index.ravel()))))
+    
+    Isovalue = Count_Isovalue(Count, Values.size, Values[Lower_Index], Values[Upper_Index], Topology)
+
+    return Isovalue
+
+##################################################
+#          Function: Threshold_Values            #
+##################################################
 
-    # Isovalue bounds depending on topology selection.
+def Threshold_Values(Domain_Field, Topology):
+   
+    """
+    
+    Transform the raw field values into the quantity compared against the isovalue for the selected topology.
+    
+    Parameters:
+        
+        - Domain_Field [numpy.Ndarray]: Array with raw TPMS equation values.
+        - Topology [String]: Equation condition. 
+    
+    Returns:
+    
+        - Values [numpy.Ndarray]: The field for "Solid 1" and "Solid 2" or its absolute value for "Sheet".
+    
+    """
     
     if Topology in ["Solid 1", "Solid 2"]:
-        Lower_Bound, Upper_Bound = -15.0, 15.0
+        Values = Domain_Field
     elif Topology == "Sheet":
-        Lower_Bound, Upper_Bound = 0.0, 15.0
-
-    # Brent method to solve isovalue to required porosity.
+        Values = np.abs(Domain_Field)
+    else:
+        raise ValueError("Topology must be 'Solid 1', 'Solid 2' or 'Sheet'.")
     
-    Adjusted_Isovalue = brentq(Density_Value, Lower_Bound, Upper_Bound, args=(Equation, Domain, Topology, Density, XDomain, YDomain, ZDomain, KX, KY, KZ))
+    return Values
 
-    # Compute final TPMS mask.
-    
-    Final_TPMS = Isovalue_Mask(Equation, Domain, Topology, Adjusted_Isovalue, XDomain, YDomain, ZDomain, KX, KY, KZ)
+##################################################
+#            Function: Solid_Counts              #
+##################################################
 
-    return Final_TPMS
\ No newline at end of file
+def Solid_Counts(Density, Number):
+   
+    """
+    
+    Compute the smallest number of solid points that reaches each target density.
+    
+    Parameters:
+        
+        - Density [Float/numpy.Ndarray]: Desired model relative density, or a vector of them.
+        - Number [Integer]: Number of grid points inside the domain.
+    
+    Returns:
+    
+        - Count [numpy.Ndarray]: Number of solid points for each target density.
+        - Lower_Index, Upper_Index [numpy.Ndarray]: Ranks of the last solid point and the first pore point in the sorted values.
+    
+    """
+    
+    # Input validation.
+    
+    Densities = np.asarray(Density, dtype=float)
+    
+    if np.any((Densities < 0) | (Densities > 1)):
+        raise ValueError("Density must be between 0 and 1.")
+    if Number == 0:
+        raise ValueError("Domain does not contain any grid point.")
+    
+    # Smallest count whose density difference is not negative.
+    
+    Count = np.ceil(Densities * Number).astype(np.int64)
+    Count = np.where((Count - 1) / Number - Densities >= 0, Count - 1, Count)
+    Count = np.clip(Count, 0, Number)
+
+    Lower_Index = np.clip(Count - 1, 0, Number - 1)
+    Upper_Index = np.clip(Count, 0, Number - 1)
+    
+    return Count, Lower_Index, Upper_Index
+
+##################################################
+#           Function: Count_Isovalue             #
+##################################################
+
+def Count_Isovalue(Count, Number, Lower_Value, Upper_Value, Topology):
+   
+    """
+    
+    Place the isovalue between the last solid point and the first pore point of the sorted values.
+    
+    Parameters:
+        
+        - Count [numpy.Ndarray]: Number of solid points for each target density.
+        - Number [Integer]: Number of grid points inside the domain.
+        - Lower_Value, Upper_Value [numpy.Ndarray]: Sorted values at the ranks returned by Solid_Counts.
+        - Topology [String]: Equation condition. 
+    
+    Returns:
+    
+        - Isovalue [Float/numpy.Ndarray]: Isovalue for each target density.
+    
+    """
+    
+    # Isovalue placed half way between the last solid point and the first pore point.
+
+    Threshold = np.where(Count == Number, Lower_Value, 0.5 * (Lower_Value + Upper_Value))
+    Threshold = np.where(Count == 0, np.nextafter(Upper_Value, -np.inf), Threshold)
+    
+    if Topology == "Solid 2":
+        Threshold = - Threshold
+    
+    Isovalue = Threshold if Threshold.ndim else float(Threshold)
+
+    return Isovalue
+
+##################################################
+#           Function: Voxel_Variation            #
+##################################################
+
+def Voxel_Variation(TPMS_Field, Domain):
+   
+    """
+    
+    Compute the change of the raw field across one voxel at the points inside the domain, from the magnitude of its central difference gradient.
+    
+    Parameters:
+        
+        - TPMS_Field [numpy.Ndarray]: Raw TPMS equation values on the grid.
+        - Domain [numpy.Ndarray]: 3D binary mask of the domain.
+    
+    Returns:
+    
+        - Variation [numpy.Ndarray]: 1D array with the field change across the voxel of every point inside the domain.
+    
+    """
+    
+    # Gradient components accumulated one axis at a time, keeping a single extra grid in memory.
+    
+    Squared_Gradient = np.zeros(TPMS_Field.shape, dtype=TPMS_Field.dtype)
+    
+    for Axis in range(3):
+        Squared_Gradient += np.gradient(TPMS_Field, axis=Axis) ** 2
+    
+    Variation = np.sqrt(Squared_Gradient[Domain])
+    
+    # Critical points, where the field is flat, keep the voxel count of Field_Density_Value.
+    
+    Variation = np.maximum(Variation, np.finfo(Variation.dtype).tiny)
+
+    return Variation
+
+##################################################
+#        Function: Partial_Volume_Density        #
+##################################################
+
+def Partial_Volume_Density(Isovalue, Domain_Field, Variation, Topology, Density):
+   
+    """
+    
+    Compute the difference between the TPMS density at a given isovalue and the target density, counting the solid fraction of every voxel.
+    The field is taken as linear across each voxel, so the fraction ramps from 0 to 1 while the isovalue crosses the voxel field range and the density is a continuous function of the isovalue.
+    
+    Parameters:
+        
+        - Isovalue [Float]: Constant isovalue.
+        - Domain_Field [numpy.Ndarray]: 1D array with the raw TPMS equation values of the points inside the domain.
+        - Variation [numpy.Ndarray]: Field change across the voxel of the same points, returned by Voxel_Variation.
+        - Topology [String]: Equation condition. 
+        - Density [Float]: Desired model relative density.
+    
+    Returns:
+    
+        - Resulted_Density [Float]: Difference between estimated and desired density used for Brent optimisation.
+    
+    """
+    
+    # Fraction of every voxel where the field lies below a threshold.
+    
+    def Fraction(Threshold):
+        return np.clip(0.5 + (Threshold - Domain_Field) / Variation, 0.0, 1.0)
+    
+    if Topology == "Solid 1":
+        Solid = Fraction(Isovalue)
+    elif Topology == "Solid 2":
+        Solid = Fraction(- Isovalue)
+    elif Topology == "Sheet":
+        Solid = Fraction(Isovalue) - Fraction(- Isovalue)
+    else:
+        raise ValueError("Topology must be 'Solid 1', 'Solid 2' or 'Sheet'.")
+    
+    Current_Density = np.mean(Solid)
+    Resulted_Density = Current_Density - Density
+
+    return Resulted_Density
+
+##################################################
+#           Function: Solve_Isovalue             #
+##################################################
+
+def Solve_Isovalue(TPMS_Field, Domain, Topology, Density, Solver="Quantile", Callback=None, Bracket=None):
+    
+    """
+    
+    Find the isovalue of an evaluated TPMS field that matches the requested relative density inside the domain.
+    
+    Parameters:
+    
+        - TPMS_Field [numpy.Ndarray]: Raw TPMS equation values on the grid.
+        - Domain [numpy.Ndarray]: 3D binary mask of the domain.
+        - Topology [String]: Equation condition. 
+        - Density [Float]: Desired model relative density.
+        - Solver [String]: Isovalue solver, "Quantile" reads it from the sorted field values, "Brent" searches it with the Brent method and "Partial Volume" searches it on the sub-voxel density estimate.
+        - Callback [Callable]: Optional function called at every Brent iteration. It may raise an exception to abort the solve.
+        - Bracket [Tuple]: Optional Brent search interval, such as the one of Calibrated_Isovalue. The whole isovalue range is searched if it does not enclose the solution.
+
+    Returns:
+        
+        - Adjusted_Isovalue [Float]: Isovalue matching the requested density.
+    
+    """
+
+    Domain_Field = TPMS_Field[np.asarray(Domain, dtype=bool)]
+
+    if Solver == "Quantile":
+        
+        # Exact isovalue from the in-domain field distribution.
+        
+        Adjusted_Isovalue = Quantile_Isovalue(Domain_Field, Topology, Density)
+    
+    elif Solver == "Brent":
+
+        # Isovalue bounds depending on topology selection.
+        
+        if Topology in ["Solid 1", "Solid 2"]:
+            Lower_Bound, Upper_Bound = -15.0, 15.0
+        elif Topology == "Sheet":
+            Lower_Bound, Upper_Bound = 0.0, 15.0
+
+        # Brent method to solve isovalue to required porosity, shifting the cached field only.
+        
+        def Objective(Isovalue):
+            if Callback is not None:
+                Callback()
+            return Field_Density_Value(Isovalue, Domain_Field, Topology, Density)
+        
+        # Narrower interval when the given bracket encloses the solution.
+        
+        if Bracket is not None and Objective(Bracket[0]) * Objective(Bracket[1]) <= 0:
+            Lower_Bound, Upper_Bound = Bracket
+        
+        Adjusted_Isovalue = brentq(Objective, Lower_Bound, Upper_Bound)
+    
+    elif Solver == "Partial Volume":
+        
+        # Continuous density estimate, so the isovalue is not limited to the steps of the voxel count.
+        
+        Variation = Voxel_Variation(TPMS_Field, np.asarray(Domain, dtype=bool))
+        
+        def Objective(Isovalue):
+            if Callback is not None:
+                Callback()
+            return Partial_Volume_Density(Isovalue, Domain_Field, Variation, Topology, Density)
+        
+        # Isovalues leaving every voxel fully solid or fully empty.
+        
+        Upper_Bound = float(np.max(np.abs(Domain_Field) + Variation))
+        Lower_Bound = 0.0 if Topology == "Sheet" else - Upper_Bound
+        
+        Adjusted_Isovalue = brentq(Objective, Lower_Bound, Upper_Bound)
+    
+    else:
+        raise ValueError("Solver must be 'Quantile', 'Brent' or 'Partial Volume'.")
+
+    return Adjusted_Isovalue
+
+##################################################
+#          Function: Relative_Density            #
+##################################################
+
+def Relative_Density(Equation, Domain, Topology, Density, XDomain, YDomain, ZDomain, KX, KY, KZ, Solver="Quantile", Workers=1, Callback=None, Full_Output=False, Bracket=None):
+    
+    """
+    
+    Find optimal isovalue and return final TPMS mask.
+    
+    Parameters:
+    
+        - Equation [String]: The TPMS equation selection.
+        - Domain [String]: The 3D geometrical shape selection.
+        - Topology [String]: Equation condition. 
+        - Density [Float/numpy.Ndarray]: Desired model relative density, a 1D vector of them for a density sweep on a single field evaluation, or a 3D target density field broadcastable to the grid, such as the one of Gradient_Field.
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        - KX [Float]: Scalar value representing the wave value in X dimension.
+        - KY [Float]: Scalar value representing the wave value in Y dimension.
+        - KZ [Float]: Scalar value representing the wave value in Z dimension.
+        - Solver [String]: Isovalue solver, "Quantile" reads it from the sorted field values, "Brent" searches it with the Brent method and "Partial Volume" searches it on the sub-voxel density estimate. A density sweep is only solved by "Quantile".
+        - Workers [Integer]: Number of threads evaluating the field. All the available processors are used if None.
+        - Callback [Callable]: Optional function called after the field evaluation and at every Brent iteration. It may raise an exception to abort the solve.
+        - Full_Output [Boolean]: Return the solved isovalue together with the mask.
+        - Bracket [Tuple]: Optional Brent search interval, such as the one of Calibrated_Isovalue.
+
+    Returns:
+        
+        - Final_TPMS [numpy.Ndarray]: 3D binary mask representing the final TPMS structure that matches the requested density, or a 4D stack of one mask per density of a sweep.    
+        - Adjusted_Isovalue [Float/numpy.Ndarray]: Solved isovalue, vector of isovalues for a density sweep, or isovalue field for a density field, only returned if Full_Output is True.
+    
+    """
+
+    if np.ndim(Density) not in (0, 1, 3):
+        raise ValueError(f"Density must be a scalar, a 1D vector or a 3D field, not {np.ndim(Density)}D")
+    if np.ndim(Density) == 1 and Solver != "Quantile":
+        raise ValueError(f"Density sweeps are only solved by the Quantile solver: {Solver}")
+
+    # Evaluate the TPMS equation once and solve the isovalue on it.
+    
+    TPMS_Field = Parallel_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers)
+    
+    if Callback is not None:
+        Callback()
+
+    if np.ndim(Density) == 3:
+        Adjusted_Isovalue = Graded_Isovalue(TPMS_Field, Domain, Topology, Density)
+    else:
+        Adjusted_Isovalue = Solve_Isovalue(TPMS_Field, Domain, Topology, Density, Solver, Callback, Bracket)
+
+    # Compute final TPMS mask, stacking one mask per density of a sweep.
+    
+    if np.ndim(Density) == 1:
+        Final_TPMS = Field_Mask(TPMS_Field, Domain, Topology, np.reshape(Adjusted_Isovalue, (-1, 1, 1, 1)))
+    else:
+        Final_TPMS = Field_Mask(TPMS_Field, Domain, Topology, Adjusted_Isovalue)
+
+    if Full_Output:
+        return Final_TPMS, Adjusted_Isovalue
+
+    return Final_TPMS
+
+##################################################
+#             Graded TPMS Functions              #
+##################################################
+
+##################################################
+#            Function: Gradient_Field            #
+##################################################
+
+def Gradient_Field(Gradient, XDomain, YDomain, ZDomain, Start, End, Axis="Z", Radius=None):
+    
+    """
+
+    Create a spatially varying isovalue or target density field for graded TPMS structures.
+    The field keeps the open shape of the grid, so it does not cost a full 3D array with a sparse grid.
+
+    Parameters:
+        
+        - Gradient [String]: Gradient selection, "Linear" along an axis or "Radial" from the Z axis outwards.
+        - XDomain [numpy.Ndarray]: 3D array representing the X coordinates of the grid points.
+        - YDomain [numpy.Ndarray]: 3D array representing the Y coordinates of the grid points.
+        - ZDomain [numpy.Ndarray]: 3D array representing the Z coordinates of the grid points.
+        - Start [Float]: Value at the lower end of the axis for "Linear" and at the Z axis for "Radial".
+        - End [Float]: Value at the upper end of the axis for "Linear" and at the radius for "Radial".
+        - Axis [String]: Axis of the "Linear" gradient, "X", "Y" or "Z".
+        - Radius [Float]: Distance from the Z axis where the "Radial" gradient reaches its end value, kept beyond it. The half width of the grid if None.
+        
+    Returns:
+
+        - Graded_Field [numpy.Ndarray]: 3D array broadcastable to the grid with the value at every point.
+    
+    """ 
+    
+    if Gradient == "Linear":
+        
+        # Linear variation between the grid bounds along the selected axis.
+        
+        if Axis not in ("X", "Y", "Z"):
+            raise ValueError(f"Unknown axis: {Axis}")
+        
+        Coordinate = {"X": XDomain, "Y": YDomain, "Z": ZDomain}[Axis]
+        Extent = np.ptp(Coordinate)
+        
+        if Extent == 0:
+            raise ValueError(f"The grid has no extent along the gradient axis: {Axis}")
+        
+        Position = (Coordinate - Coordinate.min()) / Extent
+    
+    elif Gradient == "Radial":
+        
+        # Cylindrical variation around the Z axis, as in the radial porosity of bone scaffolds.
+        
+        Radius = np.max(np.abs(XDomain)) if Radius is None else Radius
+        
+        if Radius <= 0:
+            raise ValueError("Radius must be a positive float")
+        
+        Position = np.minimum(np.sqrt(XDomain ** 2 + YDomain ** 2) / Radius, 1.0)
+    
+    else:
+        raise ValueError(f"Unknown gradient: {Gradient}")
+    
+    Graded_Field = Start + (End - Start) * Position
+    
+    return Graded_Field
+
+##################################################
+#           Function: Graded_Isovalue            #
+##################################################
+
+def Graded_Isovalue(TPMS_Field, Domain, Topology, Density_Field, Levels=64):
+    
+    """
+    
+    Find the isovalue field of an evaluated TPMS field that matches a spatially varying relative density.
+    The isovalues of a set of density levels are read off the in-domain field distribution in a single partition, as Quantile_Isovalue does for a density sweep, and interpolated at every point.
+    Each region then takes the isovalue giving its density over the whole periodic structure, so no region is solved separately.
+    
+    Parameters:
+    
+        - TPMS_Field [numpy.Ndarray]: Raw TPMS equation values on the grid.
+        - Domain [numpy.Ndarray]: 3D binary mask of the domain.
+        - Topology [String]: Equation condition. 
+        - Density_Field [numpy.Ndarray]: Desired relative density at every point, broadcastable to the grid.
+        - Levels [Integer]: Number of density levels of the interpolation. The distinct densities are solved exactly when there are not more of them, as for piecewise constant regions.
+
+    Returns:
+        
+        - Isovalue_Field [numpy.Ndarray]: Isovalue at every point, with the shape of the density field.
+    
+    """
+    
+    if Levels < 2:
+        raise ValueError("Levels must be an integer greater than 1")
+    
+    Density_Field = np.asarray(Density_Field, dtype=float)
+    Densities = np.unique(Density_Field)
+    
+    if Densities.size > Levels:
+        Densities = np.linspace(Densities[0], Densities[-1], Levels)
+    
+    Isovalues = np.atleast_1d(Quantile_Isovalue(TPMS_Field[np.asarray(Domain, dtype=bool)], Topology, Densities))
+    
+    Isovalue_Field = np.interp(Density_Field, Densities, Isovalues)
+    
+    return Isovalue_Field
+
+##################################################
+#             Out-of-Core Functions              #
+##################################################
+
+##################################################
+#             Function: Slab_Ranges              #
+##################################################
+
+def Slab_Ranges(Resolution, Block_Size):
+    
+    """
+
+    Split the first grid axis into consecutive slabs.
+
+    Parameters:
+    
+        - Resolution [Integer]: The number of points along the first axis.
+        - Block_Size [Integer]: The number of points per slab.
+
+    Returns:
+
+        - Ranges [List]: List of (Start, End) index tuples covering the axis.
+
+    """
+    
+    if Block_Size is None or Block_Size <= 0:
+        raise ValueError("Block size must be a positive integer")
+    
+    Ranges = [(Start, min(Start + Block_Size, Resolution)) for Start in range(0, Resolution, Block_Size)]
+    
+    return Ranges
+
+##################################################
+#            Function: Allocate_Array            #
+##################################################
+
+def Allocate_Array(Shape, Dtype, Path=None):
+    
+    """
+
+    Allocate an output array in memory or, when a path is given, as a memory-mapped file on disk.
+
+    Parameters:
+    
+        - Shape [Tuple]: Shape of the array.
+        - Dtype [numpy.Dtype]: Data type of the array.
+        - Path [String]: Optional file location of the memory-mapped array.
+
+    Returns:
+
+        - Array [numpy.Ndarray/numpy.Memmap]: Uninitialised output array.
+
+    """
+    
+    if Path is None:
+        Array = np.empty(Shape, dtype=Dtype)
+    else:
+        Array = np.memmap(Path, dtype=Dtype, mode='w+', shape=Shape)
+    
+    return Array
+
+##################################################
+#              Function: Slab_Grid               #
+##################################################
+
+def Slab_Grid(XDomain, YDomain, ZDomain, Start, End):
+    
+    """
+
+    Select the grid coordinates of a slab along the first axis. Open grid views that do not vary along it are kept whole.
+
+    Parameters:
+    
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, dense or open.
+        - Start [Integer]: First index of the slab.
+        - End [Integer]: Last index of the slab (excluded).
+
+    Returns:
+
+        - XSlab, YSlab, ZSlab [numpy.Ndarray]: Coordinates of the slab grid points.
+
+    """
+    
+    XSlab, YSlab, ZSlab = [Coordinates[Start:End] if Coordinates.shape[0] > 1 else Coordinates for Coordinates in (XDomain, YDomain, ZDomain)]
+    
+    return XSlab, YSlab, ZSlab
+
+##################################################
+#              Function: Slab_Field              #
+##################################################
+
+def Slab_Field(Equation, Domain_Type, XDomain, YDomain, ZDomain, KX, KY, KZ, Length, Radius, InnerRadius, Directory=None, Block_Size=64, Workers=1):
+    
+    """
+
+    Evaluate the domain mask and the raw TPMS field slab by slab into memory-mapped arrays, so they never need to fit in RAM.
+
+    Parameters:
+    
+        - Equation [String]: The TPMS equation selection.
+        - Domain_Type [String]: The 3D geometric shape selection.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, preferably the open grid of Generate_Grid_Domain.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Length [Float]: Edge distance of the domain shape.
+        - Radius [Float]: Radius distance of the domain shape.
+        - InnerRadius [Float]: Inner radius distance for "Ring" domain.
+        - Directory [String]: Folder for the memory-mapped files. A temporary folder is created if not provided.
+        - Block_Size [Integer]: The number of grid points along the first axis evaluated per slab.
+        - Workers [Integer]: Number of threads evaluating slabs concurrently.
+
+    Returns:
+
+        - TPMS_Field [numpy.Memmap]: 3D memory-mapped array containing the raw TPMS equation values.
+        - Domain [numpy.Memmap]: 3D memory-mapped boolean mask of the limiting domain shape.
+
+    """
+    
+    if Directory is None:
+        Directory = tempfile.mkdtemp(prefix="tpms_")
+    
+    Shape = np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape)
+    
+    TPMS_Field = Allocate_Array(Shape, np.result_type(XDomain, YDomain, ZDomain), os.path.join(Directory, "Field.dat"))
+    Domain = Allocate_Array(Shape, bool, os.path.join(Directory, "Domain.dat"))
+    
+    # Domain and field evaluation per slab.
+    
+    def Evaluate_Slab(Start, End):
+        XSlab, YSlab, ZSlab = Slab_Grid(XDomain, YDomain, ZDomain, Start, End)
+        Domain[Start:End] = Generate_3D_Domain(Domain_Type, XSlab, YSlab, ZSlab, Length, Radius, InnerRadius)
+        Equation_Field(Equation, XSlab, YSlab, ZSlab, KX, KY, KZ, Out=TPMS_Field[Start:End])
+    
+    Fill_Slabs(Evaluate_Slab, Shape[0], Block_Size, Workers)
+    
+    TPMS_Field.flush()
+    Domain.flush()
+    
+    return TPMS_Field, Domain
+
+##################################################
+#         Function: Slab_Quantile_Isovalue       #
+##################################################
+
+def Slab_Quantile_Isovalue(TPMS_Field, Domain, Topology, Density, Block_Size=64, Bins=65536):
+   
+    """
+    
+    Out-of-core version of Quantile_Isovalue. The order statistics are located with a histogram over the slabs,
+    and only the values falling in the selected histogram bins are loaded to resolve them exactly.
+    
+    Parameters:
+        
+        - TPMS_Field [numpy.Ndarray/numpy.Memmap]: 3D array containing the raw TPMS equation values.
+        - Domain [numpy.Ndarray/numpy.Memmap]: 3D boolean mask of the limiting domain shape.
+        - Topology [String]: Equation condition. 
+        - Density [Float/numpy.Ndarray]: Desired model relative density, or a vector of them.
+        - Block_Size [Integer]: The number of grid points along the first axis read per slab.
+        - Bins [Integer]: Number of histogram bins used to locate the order statistics.
+    
+    Returns:
+    
+        - Isovalue [Float/numpy.Ndarray]: Isovalue for each target density, equal to the in-memory Quantile_Isovalue.
+    
+    """
+    
+    Ranges = Slab_Ranges(TPMS_Field.shape[0], Block_Size)
+    
+    def Slab_Values(Start, End):
+        return Threshold_Values(np.asarray(TPMS_Field[Start:End])[np.asarray(Domain[Start:End], dtype=bool)], Topology)
+    
+    # First pass: number of in-domain points and range of the values.
+    
+    Number, Minimum, Maximum = 0, np.inf, -np.inf
+    
+    for Start, End in Ranges:
+        Values = Slab_Values(Start, End)
+        if Values.size:
+            Number += Values.size
+            Minimum = min(Minimum, Values.min())
+            Maximum = max(Maximum, Values.max())
+
+    Count, Lower_Index, Upper_Index = Solid_Counts(Density, Number)
+    Ranks = np.unique(np.concatenate((Lower_Index.ravel(), Upper_Index.ravel())))
+    
+    # Second pass: histogram of the values and bins holding the requested ranks.
+    
+    Edges = np.linspace(Minimum, Maximum, Bins + 1)
+    
+    def Value_Bins(Values):
+        return np.clip(np.searchsorted(Edges, Values, side='right') - 1, 0, Bins - 1)
+    
+    Histogram = np.zeros(Bins, dtype=np.int64)
+    
+    for Start, End in Ranges:
+        Histogram += np.bincount(Value_Bins(Slab_Values(Start, End)), minlength=Bins)
+
+    Cumulative = np.cumsum(Histogram)
+    Rank_Bins = np.searchsorted(Cumulative, Ranks, side='right')
+    Needed_Bins = np.unique(Rank_Bins)
+
+    # Third pass: gather the values of the needed bins only.
+    
+    Gathered_Bins, Gathered_Values = [], []
+    
+    for Start, End in Ranges:
+        Values = Slab_Values(Start, End)
+        Bin_Index = Value_Bins(Values)
+        Selected = np.isin(Bin_Index, Needed_Bins)
+        Gathered_Bins.append(Bin_Index[Selected])
+        Gathered_Values.append(Values[Selected])
+
+    Gathered_Bins = np.concatenate(Gathered_Bins)
+    Gathered_Values = np.concatenate(Gathered_Values)
+    Gathered_Values = Gathered_Values[np.lexsort((Gathered_Values, Gathered_Bins))]
+    
+    # Exact order statistics inside the gathered bins.
+    
+    Bin_Start = np.cumsum(Histogram[Needed_Bins]) - Histogram[Needed_Bins]
+    Bin_Offset = Cumulative[Needed_Bins] - Histogram[Needed_Bins]
+    Position = np.searchsorted(Needed_Bins, Rank_Bins)
+    Rank_Values = Gathered_Values[Bin_Start[Position] + Ranks - Bin_Offset[Position]]
+    
+    Lower_Value = Rank_Values[np.searchsorted(Ranks, Lower_Index)]
+    Upper_Value = Rank_Values[np.searchsorted(Ranks, Upper_Index)]
+    
+    Isovalue = Count_Isovalue(Count, Number, Lower_Value, Upper_Value, Topology)
+
+    return Isovalue
+
+##################################################
+#           Function: Slab_Field_Mask            #
+##################################################
+
+def Slab_Field_Mask(TPMS_Field, Domain, Topology, Isovalue, Path=None, Block_Size=64):
+
+    """
+
+    Out-of-core version of Field_Mask writing the masked TPMS slab by slab.
+
+    Parameters:
+
+        - TPMS_Field [numpy.Ndarray/numpy.Memmap]: 3D array containing the raw TPMS equation values.
+        - Domain [numpy.Ndarray/numpy.Memmap]: 3D boolean mask of the limiting domain shape.
+        - Topology [String]: Equation condition. 
+        - Isovalue [Float]: Constant isovalue.
+        - Path [String]: Optional file location of the memory-mapped result.
+        - Block_Size [Integer]: The number of grid points along the first axis processed per slab.
+
+    Returns:
+
+        - TPMS [numpy.Ndarray/numpy.Memmap]: 3D array containing the TPMS calculated points inside the limiting 3D domain shape.
+    
+    """
+    
+    TPMS = Allocate_Array(TPMS_Field.shape, TPMS_Field.dtype, Path)
+    
+    for Start, End in Slab_Ranges(TPMS_Field.shape[0], Block_Size):
+        TPMS[Start:End] = Field_Mask(np.asarray(TPMS_Field[Start:End]), np.asarray(Domain[Start:End]), Topology, Isovalue)
+    
+    if isinstance(TPMS, np.memmap):
+        TPMS.flush()
+    
+    return TPMS
+
+##################################################
+#        Function: Slab_Relative_Density         #
+##################################################
+
+def Slab_Relative_Density(Equation, Domain_Type, Topology, Density, XDomain, YDomain, ZDomain, KX, KY, KZ, Length, Radius, InnerRadius, Directory=None, Block_Size=64):
+    
+    """
+    
+    Out-of-core version of Relative_Density. Domain, field and final mask are stored as memory-mapped arrays and only one slab is resident at a time.
+    
+    Parameters:
+    
+        - Equation [String]: The TPMS equation selection.
+        - Domain_Type [String]: The 3D geometric shape selection.
+        - Topology [String]: Equation condition. 
+        - Density [Float]: Desired model relative density.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, preferably the open grid of Generate_Grid_Domain.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Length [Float]: Edge distance of the domain shape.
+        - Radius [Float]: Radius distance of the domain shape.
+        - InnerRadius [Float]: Inner radius distance for "Ring" domain.
+        - Directory [String]: Folder for the memory-mapped files. A temporary folder is created if not provided.
+        - Block_Size [Integer]: The number of grid points along the first axis processed per slab.
+
+    Returns:
+        
+        - Final_TPMS [numpy.Memmap]: 3D memory-mapped array representing the final TPMS structure that matches the requested density.
+        - Domain [numpy.Memmap]: 3D memory-mapped boolean mask of the limiting domain shape.
+    
+    """
+    
+    if Directory is None:
+        Directory = tempfile.mkdtemp(prefix="tpms_")
+    
+    # Slab-wise domain and field evaluation.
+    
+    TPMS_Field, Domain = Slab_Field(Equation, Domain_Type, XDomain, YDomain, ZDomain, KX, KY, KZ, Length, Radius, InnerRadius, Directory, Block_Size)
+    
+    # Out-of-core isovalue solution and final TPMS mask.
+    
+    Adjusted_Isovalue = Slab_Quantile_Isovalue(TPMS_Field, Domain, Topology, Density, Block_Size)
+    Final_TPMS = Slab_Field_Mask(TPMS_Field, Domain, Topology, Adjusted_Isovalue, os.path.join(Directory, "TPMS.dat"), Block_Size)
+    
+    return Final_TPMS, Domain
+
+##################################################
+#              Parallel Functions                #
+##################################################
+
+##################################################
+#             Function: Fill_Slabs               #
+##################################################
+
+def Fill_Slabs(Function, Resolution, Block_Size=None, Workers=1):
+    
+    """
+
+    Run a slab function over the first grid axis, concurrently when more than one worker is requested.
+    NumPy releases the GIL inside its ufuncs, so threads writing disjoint slabs of a preallocated output run in parallel.
+
+    Parameters:
+    
+        - Function [Callable]: Function receiving (Start, End) and filling the corresponding slab of the output in place.
+        - Resolution [Integer]: The number of points along the first axis.
+        - Block_Size [Integer]: The number of points per slab. By default four slabs per worker are used.
+        - Workers [Integer]: Number of threads. All the available processors are used if None.
+
+    Returns:
+
+        - Nothing.
+
+    """
+    
+    if Workers is None:
+        Workers = os.cpu_count() or 1
+    if Workers <= 0:
+        raise ValueError("Number of workers must be a positive integer")
+    if Block_Size is None:
+        Block_Size = max(1, -(-Resolution // (4 * Workers)))
+    
+    Ranges = Slab_Ranges(Resolution, Block_Size)
+    
+    if Workers == 1 or len(Ranges) == 1:
+        for Start, End in Ranges:
+            Function(Start, End)
+    else:
+        with ThreadPoolExecutor(max_workers=Workers) as Executor:
+            list(Executor.map(lambda Range: Function(*Range), Ranges))
+
+##################################################
+#            Function: Parallel_Field            #
+##################################################
+
+def Parallel_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers=None, Block_Size=None):
+    
+    """
+
+    Multi-threaded version of Equation_Field filling a preallocated field slab by slab.
+
+    Parameters:
+        
+        - Equation [String]: The TPMS equation selection.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, dense or open.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Workers [Integer]: Number of threads. All the available processors are used if None.
+        - Block_Size [Integer]: The number of grid points along the first axis per slab.
+        
+    Returns:
+
+        - TPMS_Field [numpy.Ndarray]: 3D array containing the raw TPMS equation values. 
+    
+    """ 
+    
+    Shape = np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape)
+    TPMS_Field = np.empty(Shape, dtype=np.result_type(XDomain, YDomain, ZDomain))
+    
+    def Evaluate_Slab(Start, End):
+        Equation_Field(Equation, *Slab_Grid(XDomain, YDomain, ZDomain, Start, End), KX, KY, KZ, Out=TPMS_Field[Start:End])
+    
+    Fill_Slabs(Evaluate_Slab, Shape[0], Block_Size, Workers)
+    
+    return TPMS_Field
+
+##################################################
+#          TPMS Equation Symmetry Table          #
+##################################################
+
+# Mirror symmetries of the equations about the grid centre: the flipped axes and the sign the field takes, f(T(X)) = Sign * f(X).
+# Entries are verified at runtime by Field_Symmetries, so a wrong or modified equation only loses its speed-up.
+
+FIELD_SYMMETRIES = {
+    'Primitive': [((0,), 1), ((1,), 1), ((2,), 1)],
+    'Gyroid': [((0, 1, 2), -1)],
+    'IWP': [((0,), 1), ((1,), 1), ((2,), 1)],
+    'Diamond': [((0, 1), 1), ((1, 2), 1)],
+    'Neovius': [((0,), 1), ((1,), 1), ((2,), 1)],
+    'FK-S': [((0, 1, 2), -1)]
+}
+
+##################################################
+#           Function: Field_Symmetries           #
+##################################################
+
+def Field_Symmetries(Equation, XAxis, YAxis, ZAxis, KX, KY, KZ, Samples=7):
+    
+    """
+
+    Check the symmetry table entries of an equation against the grid axes and a random sample of the field.
+    A symmetry is kept if the flipped grid axes are mirrored about the origin and the equation evaluated on the mirrored sample points matches.
+
+    Parameters:
+        
+        - Equation [String]: The TPMS equation selection.
+        - XAxis, YAxis, ZAxis [numpy.Ndarray]: Axis views of shape (N, 1, 1), (1, N, 1) and (1, 1, N), as returned by Grid_Axes.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Samples [Integer]: The number of sample coordinates per axis.
+        
+    Returns:
+
+        - Symmetries [List]: Verified (Flipped axes, Sign) entries of FIELD_SYMMETRIES.
+    
+    """ 
+    
+    Axes = [XAxis.ravel(), YAxis.ravel(), ZAxis.ravel()]
+    Generator = np.random.default_rng(0)
+    Sample = [Generator.uniform(-np.abs(Axis).max(), np.abs(Axis).max(), Samples) for Axis in Axes]
+    
+    def Sample_Field(Points):
+        return Equation_Field(Equation, *np.meshgrid(*Points, indexing='ij', sparse=True), KX, KY, KZ)
+    
+    Reference = Sample_Field(Sample)
+    Tolerance = 1e-9 * max(np.abs(Reference).max(), 1.0)
+    Symmetries = []
+    
+    for Flipped, Sign in FIELD_SYMMETRIES.get(Equation, []):
+        
+        # The grid must map onto itself, up to the rounding of its coordinates.
+        
+        if not all(np.allclose(Axes[Axis][::-1], -Axes[Axis], rtol=0, atol=4 * np.finfo(Axes[Axis].dtype).eps * np.abs(Axes[Axis]).max()) for Axis in Flipped):
+            continue
+        
+        Mirrored = Sample_Field([-Points if Axis in Flipped else Points for Axis, Points in enumerate(Sample)])
+        
+        if np.allclose(Mirrored, Sign * Reference, rtol=0, atol=Tolerance):
+            Symmetries.append((Flipped, Sign))
+    
+    return Symmetries
+
+##################################################
+#           Function: Symmetric_Field            #
+##################################################
+
+def Symmetric_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers=None, Block_Size=None):
+    
+    """
+
+    Version of Parallel_Field evaluating the equation on the smallest sub-block of the centred grid the verified symmetries map onto the whole grid.
+    Every symmetry halves one axis, the remaining halves are filled by mirroring back, up to 8 times less evaluation for Primitive, IWP and Neovius,
+    4 for Diamond and 2 for Gyroid and FK-S. Grids that are not axis aligned or not centred are evaluated whole.
+
+    Parameters:
+        
+        - Equation [String]: The TPMS equation selection.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, dense or open.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Workers [Integer]: Number of threads. All the available processors are used if None.
+        - Block_Size [Integer]: The number of grid points along the first axis per slab.
+        
+    Returns:
+
+        - TPMS_Field [numpy.Ndarray]: 3D array containing the raw TPMS equation values. 
+    
+    """ 
+    
+    Shape = np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape)
+    Axes = Grid_Axes(XDomain, YDomain, ZDomain)
+    
+    if any(Axis.size != Size for Axis, Size in zip(Axes, Shape)):
+        return Parallel_Field(Equation, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers, Block_Size)
+    
+    # Each symmetry halves one axis, provided none of its flipped axes was halved before.
+    
+    Steps, Halved = [], set()
+    
+    for Flipped, Sign in Field_Symmetries(Equation, *Axes, KX, KY, KZ):
+        if not Halved.intersection(Flipped) and Shape[Flipped[0]] > 1:
+            Halved.add(Flipped[0])
+            Steps.append((Flipped[0], Flipped, Sign))
+    
+    # Evaluation of the upper half of every halved axis.
+    
+    Start = [Size // 2 if Axis in Halved else 0 for Axis, Size in enumerate(Shape)]
+    TPMS_Field = np.empty(Shape, dtype=np.result_type(XDomain, YDomain, ZDomain))
+    TPMS_Field[Start[0]:, Start[1]:, Start[2]:] = Parallel_Field(Equation, Axes[0][Start[0]:], Axes[1][:, Start[1]:], Axes[2][:, :, Start[2]:], KX, KY, KZ, Workers, Block_Size)
+    
+    # Lower halves mirrored from the upper ones, in reverse order so the other flipped axes are already complete.
+    
+    for Axis, Flipped, Sign in reversed(Steps):
+        
+        Size = Shape[Axis]
+        Target = tuple(slice(0, Start[Other]) if Other == Axis else slice(Start[Other], None) for Other in range(3))
+        Source = tuple(slice(Size - 1, Size - 1 - Start[Other], -1) if Other == Axis else slice(None, None, -1) if Other in Flipped else slice(Start[Other], None) for Other in range(3))
+        
+        if Sign > 0:
+            TPMS_Field[Target] = TPMS_Field[Source]
+        else:
+            np.negative(TPMS_Field[Source], out=TPMS_Field[Target])
+        
+        Start[Axis] = 0
+    
+    return TPMS_Field
+
+##################################################
+#          Function: Parallel_3D_Domain          #
+##################################################
+
+def Parallel_3D_Domain(Domain_Type, XDomain, YDomain, ZDomain, Length, Radius, InnerRadius, Workers=None, Block_Size=None):
+    
+    """
+
+    Multi-threaded version of Generate_3D_Domain filling a preallocated mask slab by slab.
+
+    Parameters:
+        
+        - Domain_Type [String]: The 3D geometric shape selection.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, dense or open.
+        - Length [Float]: Edge distance of the domain shape.
+        - Radius [Float]: Radius distance of the domain shape.
+        - InnerRadius [Float]: Inner radius distance for "Ring" domain.
+        - Workers [Integer]: Number of threads. All the available processors are used if None.
+        - Block_Size [Integer]: The number of grid points along the first axis per slab.
+        
+    Returns:
+
+        - Domain_Mask [numpy.Ndarray]: A 3D array points using boolean category. Where points outside the selected shape are False.
+    
+    """ 
+    
+    Shape = np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape)
+    Domain_Mask = np.empty(Shape, dtype=bool)
+    
+    def Evaluate_Slab(Start, End):
+        Domain_Mask[Start:End] = Generate_3D_Domain(Domain_Type, *Slab_Grid(XDomain, YDomain, ZDomain, Start, End), Length, Radius, InnerRadius)
+    
+    Fill_Slabs(Evaluate_Slab, Shape[0], Block_Size, Workers)
+    
+    return Domain_Mask
+
+##################################################
+#             Hybrid TPMS Functions              #
+##################################################
+
+##################################################
+#              Function: Hybrid_Field            #
+##################################################
+
+def Hybrid_Field(Equations, Weights, XDomain, YDomain, ZDomain, KX, KY, KZ, Workers=None, Block_Size=32, Full_Output=False):
+    
+    """
+
+    Blend several raw TPMS equations by their weight fields, such as a Gyroid to Diamond transition across the part.
+    The grid is split into cubic blocks and every equation is only evaluated on the blocks where its weight is not zero, accumulating into a single preallocated field.
+    Time and memory then scale with the volume of the transition zones instead of the number of equations.
+
+    Parameters:
+        
+        - Equations [List]: TPMS equation selections.
+        - Weights [List]: Weight of each equation, a float or an array broadcastable to the grid such as the one of Gradient_Field. The weights normally add up to one at every point.
+        - XDomain, YDomain, ZDomain [numpy.Ndarray]: Coordinates X - Y - Z of the grid points, dense or open.
+        - KX, KY, KZ [Float]: Scalar values representing the wave values in X, Y and Z dimensions.
+        - Workers [Integer]: Number of threads. All the available processors are used if None.
+        - Block_Size [Integer]: The number of grid points per block edge.
+        - Full_Output [Boolean]: Return the number of blocks evaluated for each equation together with the field.
+        
+    Returns:
+
+        - TPMS_Field [numpy.Ndarray]: 3D array containing the blended raw TPMS equation values. 
+        - Evaluated [numpy.Ndarray]: Number of blocks on which each equation was evaluated, out of the total block count, only returned if Full_Output is True.
+    
+    """ 
+    
+    if len(Equations) != len(Weights):
+        raise ValueError("Equations and Weights must have the same length")
+    if Block_Size <= 0:
+        raise ValueError("Block_Size must be a positive integer")
+    
+    Shape = np.broadcast_shapes(XDomain.shape, YDomain.shape, ZDomain.shape)
+    TPMS_Field = np.zeros(Shape, dtype=np.result_type(XDomain, YDomain, ZDomain))
+    Weights = [np.asarray(Weight, dtype=TPMS_Field.dtype) for Weight in Weights]
+    
+    # Cubic blocks of the grid, indexed in a flat list shared by the threads. Every thread only marks the equations
+    # evaluated on its own blocks, and the marks are counted once all the threads are done.
+    
+    Corners = [(I, J, K) for I in range(0, Shape[0], Block_Size) for J in range(0, Shape[1], Block_Size) for K in range(0, Shape[2], Block_Size)]
+    Evaluated = np.zeros((len(Corners), len(Equations)), dtype=bool)
+    
+    def Block_View(Array, Block):
+        if Array.ndim == 0:
+            return Array
+        return Array[tuple(slice(None) if Array.shape[Axis] == 1 else Block[Axis] for Axis in range(3))]
+    
+    def Evaluate_Blocks(Start, End):
+        
+        for Index, Corner in enumerate(Corners[Start:End], Start):
+            
+            Block = tuple(slice(Index, Index + Block_Size) for Index in Corner)
+            Block_Grid = [Block_View(Coordinates, Block) for Coordinates in (XDomain, YDomain, ZDomain)]
+            Block_Field = TPMS_Field[Block]
+            
+            for Number, (Equation, Weight) in enumerate(zip(Equations, Weights)):
+                
+                Block_Weight = Block_View(Weight, Block)
+                
+                # Equations without weight in the block are not evaluated, and unit weights skip the product.
+                
+                if not np.any(Block_Weight):
+                    continue
+                
+                Field = Equation_Field(Equation, *Block_Grid, KX, KY, KZ)
+                
+                if np.all(Block_Weight == 1):
+                    Block_Field += Field
+                else:
+                    Block_Field += Block_Weight * Field
+                
+                Evaluated[Index, Number] = True
+    
+    Fill_Slabs(Evaluate_Blocks, len(Corners), 1, Workers)
+    
+    if Full_Output:
+        return TPMS_Field, Evaluated.sum(axis=0)
+    
+    return TPMS_Field
@@ -139,7 +139,7 @@ def Vertices_Surface(Vertices, Faces):
     
     # Distribute each triangle's surface equally among its three vertices.
     
-    Surface = np.zeros(Number, dtype=float)
+    Surface = np.zeros(Number, dtype=Face_Surface.dtype)
     np.add.at(Surface, Faces[:,0], Face_Surface/3.0)
     np.add.at(Surface, Faces[:,1], Face_Surface/3.0)
     np.add.at(Surface, Faces[:,2], Face_Surface/3.0)